@@ -0,0 +1,99 @@
+"""Microbenchmark: retained memory and allocations for tool payloads.
+
+Feeds synthetic Google CSE responses (with the pagemap/metatags bulk the
+real API returns) through the old path -- response.json() plus a list of
+copied dicts -- and through core.payloads: one decode (orjson when
+installed) straight into immutable records sharing a key tuple.
+
+    python -m benchmarks.bench_payloads [responses] [items_per_response]
+
+Both paths keep every response, like a long session's history and cache
+do, and read title/snippet from every result once (fact extraction).
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from core.payloads import Record, loads, orjson
+from core.search import WEB_KEYS, _google_item
+
+
+def google_response(seed: int, items: int) -> bytes:
+    return json.dumps({
+        "kind": "customsearch#search",
+        "queries": {"request": [{"title": "Google Custom Search", "totalResults": "1230000",
+                                 "searchTerms": f"movie {seed} imdb rating", "count": items}]},
+        "searchInformation": {"searchTime": 0.31, "totalResults": "1230000"},
+        "items": [
+            {
+                "kind": "customsearch#result",
+                "title": f"Movie {seed}-{i} (2022) - IMDb",
+                "htmlTitle": f"<b>Movie {seed}</b>-{i} (2022) - IMDb",
+                "link": f"https://www.imdb.com/title/tt{seed:07d}/",
+                "displayLink": "www.imdb.com",
+                "snippet": f"Movie {seed}: Directed by Someone. Rating {i % 10}.{seed % 10}/10. "
+                           "The film was released on March 4, 2022. Runtime 176 min.",
+                "htmlSnippet": f"<b>Movie {seed}</b>: Directed by Someone. Rating ...",
+                "formattedUrl": f"https://www.imdb.com/title/tt{seed:07d}/",
+                "pagemap": {
+                    "cse_thumbnail": [{"src": "https://example.invalid/t.jpg", "width": "182", "height": "268"}],
+                    "metatags": [{
+                        "og:title": f"Movie {seed} (2022) ⭐ 7.8 | Action, Crime, Drama",
+                        "og:description": "When a sadistic serial killer begins murdering key political "
+                                          "figures, the Batman is forced to investigate. " * 2,
+                        "og:image": "https://example.invalid/poster.jpg",
+                        "twitter:card": "summary_large_image",
+                        "viewport": "width=device-width",
+                    }],
+                },
+            }
+            for i in range(items)
+        ],
+    }).encode("utf-8")
+
+
+def legacy(raw: bytes):
+    data = json.loads(raw)
+    return [
+        {"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+        for item in data.get("items", [])
+    ]
+
+
+def records(raw: bytes):
+    return [Record(WEB_KEYS, _google_item(item)) for item in loads(raw).get("items", [])]
+
+
+def measure(parse, responses):
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = []
+    for raw in responses:
+        results = parse(raw)
+        for result in results:
+            result.get("title"), result.get("snippet")
+        kept.append(results)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained, peak, kept
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    responses = [google_response(i, items) for i in range(n)]
+    size = sum(len(raw) for raw in responses)
+
+    print(f"{n} responses x {items} items ({size / 1024 / 1024:.1f} MiB raw, "
+          f"parser: {'orjson' if orjson is not None else 'json'})")
+    for label, parse in (("response.json + dicts", legacy), ("loads + records", records)):
+        elapsed, retained, peak, kept = measure(parse, responses)
+        print(f"  {label:24s} {elapsed:.3f}s  retained {retained / 1024:7.0f} KiB  "
+              f"peak {peak / 1024:7.0f} KiB  ({retained / (n * items):.0f} B/result)")
+        del kept
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Throughput benchmark: CPU-bound post-processing on threads vs processes.
+
+Each job is one web response: fact extraction over its snippets plus a
+fuzzy title match per result against an entity index of `titles` films
+(the work ConversationManager.call_tool does after every tool call). Jobs
+run on a thread pool, where they serialize on the GIL, and on CPUPool
+with 1, 2, 4, ... workers up to the core count.
+
+    python -m benchmarks.bench_workers [jobs] [titles]
+
+On a multi-core Linux box the process rows should scale roughly with the
+worker count; the thread row stays flat however many threads it gets.
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.entities import EntityIndex
+from core.workers import CPUPool, post_process
+
+SNIPPETS = [
+    "{title}: Directed by Matt Reeves. With Robert Pattinson, Zoë Kravitz. Rating 7.8/10.",
+    "{title} grossed $975 million worldwide and was released on July 21, 2023.",
+    "{title} ({year}) - IMDb. Stars: Timothée Chalamet, Zendaya. 2h 46m.",
+    "Read the latest reviews, trailers and news about upcoming movies and TV shows.",
+    "{title} is a science fiction action film written and directed by Christopher Nolan.",
+]
+WORDS = ("night", "dark", "river", "king", "last", "silent", "city", "red", "storm", "garden",
+         "empire", "ghost", "summer", "iron", "lost", "glass", "wild", "north", "blue", "moon")
+
+
+def build_index(size: int) -> EntityIndex:
+    index = EntityIndex()
+    for i in range(size):
+        title = " ".join(WORDS[(i * k + k) % len(WORDS)] for k in range(1, 4)).title() + f" {i}"
+        index.add(f"tt{i:07d}", title, str(1960 + i % 60))
+    return index
+
+
+def build_jobs(index: EntityIndex, count: int):
+    films = list(index.entities.values())
+    jobs = []
+    for i in range(count):
+        film = films[(i * 7919) % len(films)]
+        # trailer-style titles, so most lookups miss the exact match and go fuzzy
+        titles = [f"{film.title} - Official Trailer ({film.year})", f"{film.title.lower()} review", "Top 10 movies"]
+        snippets = [s.format(title=film.title, year=film.year) for s in SNIPPETS]
+        jobs.append((snippets, titles))
+    return jobs
+
+
+def run_threads(index: EntityIndex, jobs, workers: int, directory: str) -> float:
+    journal = index.journal(os.path.join(directory, "titles.idx"))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda job: post_process(journal, *job), jobs))
+    return time.perf_counter() - start
+
+
+def run_processes(index: EntityIndex, jobs, workers: int) -> float:
+    pool = CPUPool(workers)
+    try:
+        list(pool.map(index, jobs[:workers]))  # start workers and load the index
+        start = time.perf_counter()
+        list(pool.map(index, jobs))
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_titles = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    cores = os.cpu_count() or 1
+
+    index = build_index(n_titles)
+    jobs = build_jobs(index, n_jobs)
+    print(f"{n_jobs} responses, {n_titles} indexed titles, {cores} cores")
+
+    with tempfile.TemporaryDirectory() as directory:
+        elapsed = run_threads(index, jobs, cores, directory)
+        print(f"  threads x{cores:<3d}  {elapsed:7.2f}s  {n_jobs / elapsed:8.0f} responses/s")
+
+    workers = 1
+    while True:
+        elapsed = run_processes(index, jobs, workers)
+        print(f"  processes x{workers:<3d}{elapsed:7.2f}s  {n_jobs / elapsed:8.0f} responses/s")
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import atexit
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# -------------------------------------------------------------------
+# Append-only columnar analytics log
+# -------------------------------------------------------------------
+# Events are buffered in memory column by column and flushed as blocks:
+#
+#   b"MRAB" | u32 rows | u32 payload bytes | zlib(columns...)
+#
+# Numeric columns are packed arrays; string columns are dictionary encoded
+# (u32 entries, u16-length-prefixed UTF-8 values, u16/u32 codes). Blocks
+# are only ever appended. A block torn by a crash mid-write is skipped on
+# read, and reading resumes at the next MAGIC, i.e. at whatever the next
+# run appended after it.
+
+MAGIC = b"MRAB"
+HEADER = struct.Struct("<4sII")
+
+SCHEMA = (
+    ("ts", "d"),              # unix time
+    ("kind", "s"),            # query | tool | llm
+    ("name", "s"),            # tool name or model
+    ("title", "s"),           # normalized title the event is about
+    ("source", "s"),          # user | prefetch | refresh
+    ("cache", "s"),           # hit | miss | wait | refresh | bypass (llm) | ""
+    ("latency_ms", "d"),
+    ("payload_bytes", "q"),
+    ("tokens_in", "q"),
+    ("tokens_out", "q"),
+)
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _encode_strings(values: List[str]) -> bytes:
+    table, codes = {}, []
+    for value in values:
+        codes.append(table.setdefault(value, len(table)))
+
+    parts = [struct.pack("<I", len(table))]
+    for value in table:
+        raw = value.encode("utf-8")[:0xFFFF]
+        parts.append(struct.pack("<H", len(raw)))
+        parts.append(raw)
+    parts.append(array("H" if len(table) <= 0xFFFF else "I", codes).tobytes())
+    return b"".join(parts)
+
+
+def _decode_strings(buf: memoryview, offset: int, rows: int):
+    (size,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    table = []
+    for _ in range(size):
+        (length,) = struct.unpack_from("<H", buf, offset)
+        offset += 2
+        table.append(bytes(buf[offset:offset + length]).decode("utf-8"))
+        offset += length
+
+    codes = array("H" if size <= 0xFFFF else "I")
+    end = offset + rows * codes.itemsize
+    codes.frombytes(buf[offset:end])
+    return [table[c] for c in codes], end
+
+
+class AnalyticsLog:
+    def __init__(self, path: str, flush_rows: int = 256):
+        self.path = path
+        self.flush_rows = flush_rows
+        self._columns = {name: [] for name, _ in SCHEMA}
+        self._rows = 0
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, kind: str, name: str = "", title: str = "", source: str = "",
+               cache: str = "", latency_ms: float = 0.0, payload_bytes: int = 0,
+               tokens_in: int = 0, tokens_out: int = 0):
+        row = {
+            "ts": time.time(), "kind": kind, "name": name, "title": title,
+            "source": source, "cache": cache, "latency_ms": float(latency_ms),
+            "payload_bytes": int(payload_bytes), "tokens_in": int(tokens_in),
+            "tokens_out": int(tokens_out),
+        }
+        with self._lock:
+            for column, _ in SCHEMA:
+                self._columns[column].append(row[column])
+            self._rows += 1
+            if self._rows >= self.flush_rows:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._rows:
+            return
+
+        parts = []
+        for column, kind in SCHEMA:
+            values = self._columns[column]
+            parts.append(_encode_strings(values) if kind == "s" else array(kind, values).tobytes())
+        payload = zlib.compress(b"".join(parts), 6)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(HEADER.pack(MAGIC, self._rows, len(payload)) + payload)
+
+        self._columns = {name: [] for name, _ in SCHEMA}
+        self._rows = 0
+
+
+def _decode_block(payload: bytes, rows: int) -> Dict[str, list]:
+    buf = memoryview(zlib.decompress(payload))
+    pos, block = 0, {}
+    for column, kind in SCHEMA:
+        if kind == "s":
+            block[column], pos = _decode_strings(buf, pos, rows)
+        else:
+            values = array(kind)
+            end = pos + rows * values.itemsize
+            values.frombytes(buf[pos:end])
+            block[column], pos = values.tolist(), end
+    if pos != len(buf) or any(len(values) != rows for values in block.values()):
+        raise ValueError("block does not match its header")
+    return block
+
+
+def read_blocks(path: str) -> Iterator[Dict[str, list]]:
+    with open(path, "rb") as f:
+        data = f.read()
+
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        magic, rows, length = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        block = None
+        if magic == MAGIC and start + length <= len(data):
+            try:
+                block = _decode_block(data[start:start + length], rows)
+            except (zlib.error, struct.error, ValueError, IndexError):
+                pass  # torn block, possibly with later blocks appended after it
+
+        if block is None:
+            # resynchronise on the next block header
+            offset = data.find(MAGIC, offset + 1)
+            if offset < 0:
+                return
+            continue
+
+        yield block
+        offset = start + length
+
+
+# -------------------------------------------------------------------
+# Aggregation / CLI
+# -------------------------------------------------------------------
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _bucket(latency_ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms < bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def summarize(path: str, top: int = 10) -> Dict[str, Any]:
+    titles = Counter()
+    cache = defaultdict(Counter)
+    latencies = defaultdict(list)
+    payload = Counter()
+    tokens = Counter()
+
+    for block in read_blocks(path):
+        for i in range(len(block["ts"])):
+            kind, name = block["kind"][i], block["name"][i]
+            if kind == "query":
+                if block["title"][i]:
+                    titles[block["title"][i]] += 1
+                tokens["in"] += block["tokens_in"][i]
+                tokens["out"] += block["tokens_out"][i]
+            label = f"{kind}:{name}" if name else kind
+            latencies[label].append(block["latency_ms"][i])
+            if kind == "tool":
+                cache[name][block["cache"][i] or "none"] += 1
+                payload[name] += block["payload_bytes"][i]
+            elif kind == "llm" and block["cache"][i]:
+                cache[f"llm:{name}"][block["cache"][i]] += 1
+
+    return {
+        "top_titles": titles.most_common(top),
+        "cache": {name: dict(counts) for name, counts in cache.items()},
+        "latency": latencies,
+        "payload_bytes": dict(payload),
+        "tokens": dict(tokens),
+    }
+
+
+def print_report(summary: Dict[str, Any], out=sys.stdout):
+    print("Top titles", file=out)
+    for title, count in summary["top_titles"]:
+        print(f"  {count:6d}  {title}", file=out)
+
+    print("\nCache outcomes per tool / model", file=out)
+    for name, counts in sorted(summary["cache"].items()):
+        # background refreshes are not lookups anyone waited on
+        lookups = sum(counts.values()) - counts.get("refresh", 0)
+        served = counts.get("hit", 0) + counts.get("wait", 0)
+        rate = served / lookups if lookups else 0.0
+        detail = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"  {name:20s} hit rate {rate:6.1%}  ({detail}; "
+              f"{summary['payload_bytes'].get(name, 0) / 1024:.1f} KiB)", file=out)
+
+    print("\nLatency (ms)", file=out)
+    labels = [f"<{b}" for b in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}"]
+    for label, values in sorted(summary["latency"].items()):
+        print(f"  {label}: n={len(values)} p50={_percentile(values, 50):.0f} "
+              f"p95={_percentile(values, 95):.0f} max={max(values):.0f}", file=out)
+        histogram = Counter(_bucket(v) for v in values)
+        peak = max(histogram.values())
+        for i, bucket_label in enumerate(labels):
+            if histogram[i]:
+                bar = "#" * max(1, round(30 * histogram[i] / peak))
+                print(f"    {bucket_label:>7s} {histogram[i]:6d} {bar}", file=out)
+
+    if summary["tokens"]:
+        print(f"\nLLM tokens: in={summary['tokens'].get('in', 0)} "
+              f"out={summary['tokens'].get('out', 0)}", file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Aggregate the query/tool analytics log.")
+    parser.add_argument("path", nargs="?", default=os.getenv("ANALYTICS_LOG", "analytics.mra"))
+    parser.add_argument("--top", type=int, default=10, help="number of titles to list")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"no analytics log at {args.path}")
+    print_report(summarize(args.path, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# -------------------------------------------------------------------
+# Disk-backed LLM completion cache
+# -------------------------------------------------------------------
+# Exact reuse only: the key is a SHA-256 over the model, the full message
+# list and the request parameters, so any change to the prompt, context or
+# history is a miss. Entries are zlib-compressed JSON files:
+#
+#   <root>/ab/abcdef....z    {"response", "usage", "latency", "model"}
+#   <root>/hits.log          one line per recent hit: model, latency, tokens in/out
+#   <root>/hits.json         per-model totals of older hits
+#
+# The cache is bounded by total bytes on disk; the least recently used
+# entries (by mtime, refreshed on every hit) are removed first. hits.log
+# is rolled up into hits.json once it passes HITS_LOG_MAX_BYTES, so the
+# hit accounting stays a few KiB however long the cache lives.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HITS_LOG_MAX_BYTES = 64 * 1024
+
+# USD per million (input, output) tokens, for the savings report only
+PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "meta-llama/llama-4-scout-17b-16e-instruct": (0.11, 0.34),
+    "meta-llama/llama-4-maverick-17b-128e-instruct": (0.20, 0.60),
+}
+
+
+def completion_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cost(model: str, tokens_in: int, tokens_out: int) -> float:
+    price_in, price_out = PRICES.get(model, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+class CompletionCache:
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # path -> size, least recently used first
+        self._entries = OrderedDict()
+        self._total = 0
+        self._scan()
+
+    def _scan(self):
+        found = []
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".z"):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total += size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.z")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error):
+            # torn or foreign file; drop it and call the model again
+            self._remove(path)
+            return None
+
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        self._log_hit(entry)
+        return entry
+
+    def set(self, key: str, response: str, usage: Tuple[int, int], latency: float, model: str):
+        data = zlib.compress(json.dumps({
+            "response": response, "usage": list(usage), "latency": latency, "model": model,
+        }, ensure_ascii=False).encode("utf-8"), 6)
+
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return  # best effort; the answer itself is already in hand
+
+        with self._lock:
+            self._total += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old, size = self._entries.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass  # evicted by another process sharing the directory
+
+    def _remove(self, path: str):
+        with self._lock:
+            self._total -= self._entries.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _log_hit(self, entry: Dict[str, Any]):
+        tokens_in, tokens_out = entry.get("usage") or (0, 0)
+        line = f"{time.time():.0f}\t{entry.get('model', '')}\t{entry.get('latency', 0.0):.3f}\t{tokens_in}\t{tokens_out}\n"
+        log = os.path.join(self.root, "hits.log")
+        try:
+            with open(log, "a", encoding="utf-8") as f:
+                f.write(line)
+                full = f.tell() > HITS_LOG_MAX_BYTES
+        except OSError:
+            return
+        if full:
+            with self._lock:
+                roll_up(self.root)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._total
+
+
+# -------------------------------------------------------------------
+# Hit accounting / savings report / CLI
+# -------------------------------------------------------------------
+def _read_totals(root: str) -> Dict[str, List[float]]:
+    # model -> [hits, seconds, tokens_in, tokens_out]
+    try:
+        with open(os.path.join(root, "hits.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _add_log(totals: Dict[str, List[float]], path: str):
+    try:
+        f = open(path, encoding="utf-8")
+    except OSError:
+        return
+    with f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 5:
+                continue  # torn line
+            _, model, latency, t_in, t_out = parts
+            row = totals.setdefault(model, [0, 0.0, 0, 0])
+            row[0] += 1
+            row[1] += float(latency)
+            row[2] += int(t_in)
+            row[3] += int(t_out)
+
+
+def roll_up(root: str):
+    # folds hits.log into hits.json. The log is renamed away first, so a
+    # process appending meanwhile starts a fresh hits.log and no line is
+    # counted twice; best effort, like the rest of the cache.
+    log = os.path.join(root, "hits.log")
+    pending = f"{log}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.replace(log, pending)
+    except OSError:
+        return  # already rolled up by someone else
+
+    totals = _read_totals(root)
+    _add_log(totals, pending)
+    path = os.path.join(root, "hits.json")
+    try:
+        with open(f"{pending}.json", "w", encoding="utf-8") as f:
+            json.dump(totals, f)
+        os.replace(f"{pending}.json", path)
+        os.remove(pending)
+    except OSError:
+        pass
+
+
+def summarize(root: str) -> Dict[str, Any]:
+    cache = CompletionCache(root, max_bytes=float("inf"))
+    totals = _read_totals(root)
+    _add_log(totals, os.path.join(root, "hits.log"))
+
+    hits, seconds, tokens_in, tokens_out, dollars = 0, 0.0, 0, 0, 0.0
+    for model, (n, latency, t_in, t_out) in totals.items():
+        hits += n
+        seconds += latency
+        tokens_in += t_in
+        tokens_out += t_out
+        dollars += cost(model, t_in, t_out)
+
+    return {
+        "entries": len(cache), "bytes": cache.size, "hits": hits, "seconds": seconds,
+        "tokens_in": tokens_in, "tokens_out": tokens_out, "dollars": dollars,
+    }
+
+
+def print_report(summary: Dict[str, Any], out=sys.stdout):
+    print(f"Entries: {summary['entries']} ({summary['bytes'] / 1024:.1f} KiB compressed)", file=out)
+    print(f"Hits:    {summary['hits']}", file=out)
+    print(f"Saved:   {summary['seconds']:.1f}s of model latency, "
+          f"{summary['tokens_in']} prompt + {summary['tokens_out']} completion tokens "
+          f"(~${summary['dollars']:.4f})", file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report what the LLM completion cache has saved.")
+    parser.add_argument("root", nargs="?", default=os.getenv("LLM_CACHE_DIR"))
+    args = parser.parse_args(argv)
+
+    if not args.root or not os.path.isdir(args.root):
+        parser.error("no completion cache directory (pass one or set LLM_CACHE_DIR)")
+    print_report(summarize(args.root))
+
+
+if __name__ == "__main__":
+    main()
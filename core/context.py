@@ -0,0 +1,135 @@
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+from core.registry import ToolRegistry, ResultSchema
+
+
+# -------------------------------------------------------------------
+# Compact, windowed context serialization
+# -------------------------------------------------------------------
+# Every tool call is serialized exactly once, when it is recorded, into a
+# small pipe-delimited table:
+#
+#   [OMDB Search] The Batman
+#   title|year|rating|genre|director|actors|plot|imdbID
+#   The Batman|2022|7.8|Action, Crime|Matt Reeves|...|...|tt1877830
+#
+# The columns and row format come from each tool's declared ResultSchema.
+#
+# Web results get an extra 'facts: rating=7.8/10; ...' line (core.extract).
+#
+# Blocks are grouped by film. Once more than `max_films` films have tables,
+# all but the `max_films // 2` most recently asked about are folded into a
+# one-line summary each, capped at `max_summary_chars`, so the context
+# stays bounded however long the session runs. Rendering puts the summary
+# first and the tables after it in the order they were added, so between
+# folds (every few new films, in batches) the context only grows at the
+# end and its prefix stays byte-identical (cacheable on the provider side).
+
+
+def _record_key(tool_name: str, result: Dict[str, Any]) -> str:
+    key = result.get("imdbLink") or result.get("link")
+    if not key:
+        key = f"{result.get('title', '')}|{result.get('year', '')}".lower()
+    return f"{tool_name}:{key}"
+
+
+class ContextBuilder:
+    def __init__(self, registry: Optional[ToolRegistry] = None, max_films: int = 6,
+                 max_summary_chars: int = 1200, line_chars: int = 160,
+                 describe: Optional[Callable[[str], Optional[str]]] = None):
+        self.registry = registry if registry is not None else ToolRegistry()
+        # film -> one-line digest of everything merged for it (Entity.digest)
+        self.describe = describe
+        self.max_films = max_films
+        self.max_summary_chars = max_summary_chars
+        self.line_chars = line_chars
+        # (film, block, record keys) in the order blocks were added
+        self.entries: List[Tuple[str, str, List[str]]] = []
+        # film -> its entries, for folding
+        self.films: Dict[str, List[Tuple[str, str, List[str]]]] = {}
+        # films by last use, least recent first
+        self.recent: "OrderedDict[str, None]" = OrderedDict()
+        self.seen = set()
+        self.summary_lines = deque()
+        self.summary_chars = 0
+
+    @property
+    def blocks(self) -> List[str]:
+        return [block for _, block, _ in self.entries]
+
+    def serialize(self, tool_name: str, query: str, results: Dict[str, Any],
+                  seen: set) -> Tuple[str, List[str]]:
+        schema = self.registry.schema(tool_name)
+
+        rows, keys = [], []
+        for result in results.get("results", []):
+            key = _record_key(tool_name, result)
+            if key in seen:
+                continue
+            seen.add(key)
+            keys.append(key)
+            rows.append(schema.context_row(result))
+
+        if not rows:
+            return "", keys
+
+        lines = [f"[{tool_name}] {ResultSchema.clean(query)}", schema.context_header()] + rows
+        facts = results.get("facts")
+        if facts:
+            lines.append("facts: " + "; ".join(f"{k}={ResultSchema.clean(v)}" for k, v in facts.items()))
+        return "\n".join(lines), keys
+
+    def add(self, tool_name: str, query: str, results: Dict[str, Any], film: Optional[str] = None):
+        film = film or query
+        block, keys = self.serialize(tool_name, query, results, self.seen)
+        self.recent[film] = None
+        self.recent.move_to_end(film)
+        if block:
+            entry = (film, block, keys)
+            self.entries.append(entry)
+            self.films.setdefault(film, []).append(entry)
+        if len(self.recent) > self.max_films:
+            while len(self.recent) > max(self.max_films // 2, 1):
+                self._fold(next(iter(self.recent)))
+
+    def _fold(self, film: str):
+        del self.recent[film]
+        entries = self.films.pop(film, [])
+        if not entries:
+            return
+        self.entries = [entry for entry in self.entries if entry[0] != film]
+        for _, _, keys in entries:
+            # a film asked about again gets its tables back in full
+            self.seen.difference_update(keys)
+
+        line = self.summarize(film, entries)
+        self.summary_lines.append(line)
+        self.summary_chars += len(line) + 1
+        while self.summary_chars > self.max_summary_chars and len(self.summary_lines) > 1:
+            self.summary_chars -= len(self.summary_lines.popleft()) + 1
+
+    def summarize(self, film: str, entries: List[Tuple[str, str, List[str]]]) -> str:
+        text = self.describe(film) if self.describe is not None else None
+        if not text:
+            # the first row of the first table, e.g. the OMDB record
+            first = entries[0][1].split("\n")
+            text = " ".join(first[2:3]) or first[0]
+        if len(text) > self.line_chars:
+            text = text[:self.line_chars - 3].rstrip() + "..."
+        return f"- {text}"
+
+    def summary(self) -> str:
+        if not self.summary_lines:
+            return ""
+        return "Films discussed earlier:\n" + "\n".join(self.summary_lines)
+
+    def render(self, pending: Iterable[Tuple[str, str, Dict[str, Any]]] = ()) -> str:
+        # pending calls are appended to a copy, leaving committed blocks untouched
+        parts = [self.summary()] if self.summary_lines else []
+        parts.extend(self.blocks)
+        seen = set(self.seen)
+        for tool_name, query, results in pending:
+            block, _ = self.serialize(tool_name, query, results, seen)
+            if block:
+                parts.append(block)
+        return "\n\n".join(parts)
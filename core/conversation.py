@@ -1,14 +1,49 @@
+import json
+import threading
 import time
-from typing import List, Dict, Any, Tuple
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from core.search import SearchTool
 from core.llm import LLMClient
+from core.context import ContextBuilder
+from core.history import TurnWindow
+from core.scheduler import CancellationToken, RateLimiter, check
+from core.cache import TTLCache
+from core.titles import guess_title, plausible_title
+from core.extract import annotate_results
+from core.entities import Entity, EntityIndex, normalize_title
+from core.analytics import AnalyticsLog
+from core.registry import COST_LOW, ToolRegistry
+from core.workers import CPUPool
 
 
 class ConversationManager:
-    def __init__(self, tools: List[SearchTool], llm: LLMClient):
-        self.tools = {tool.name: tool for tool in tools}
+    def __init__(self, tools: List[SearchTool], llm: LLMClient, analytics: Optional[AnalyticsLog] = None,
+                 cpu_pool: Optional[CPUPool] = None):
+        self.registry = ToolRegistry(tools)
+        self.tools = self.registry.tools
         self.llm = llm
         self.history = []
+        self.context = ContextBuilder(self.registry, describe=self.describe_film)
+        self.window = TurnWindow()
+        self.lock = threading.RLock()
+
+        self.cache = TTLCache(max_entries=256, ttl=1800)
+        # catalogue lookups kept warm by core.refresher; sized and given a long
+        # TTL by the refresher so they never compete with user queries
+        self.catalogue = TTLCache(max_entries=0)
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        # at most one speculative prefetch every two seconds, bursts of three
+        self.prefetch_limiter = RateLimiter(rate=0.5, burst=3)
+        # trailers cost 100 of YouTube's 10k daily units: one every two minutes
+        self.video_prefetch_limiter = RateLimiter(rate=1 / 120, burst=2)
+        self.entities = EntityIndex()
+        # normalized title -> number of user queries, drives cache refresh order
+        self.popularity = Counter()
+        self.analytics = analytics
+        # fact extraction and title matching in worker processes (batch/server)
+        self.cpu_pool = cpu_pool
 
     def add_message(self, role: str, content: str):
         self.history.append({
@@ -16,8 +51,10 @@ class ConversationManager:
             "content": content,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         })
+        if role in ("user", "assistant"):
+            self.window.add(role, content)
 
-    def add_tool_call(self, tool_name: str, query: str, results: Dict[str, Any]):
+    def add_tool_call(self, tool_name: str, query: str, results: Dict[str, Any], film: Optional[str] = None):
         self.history.append({
             "role": "tool",
             "tool": tool_name,
@@ -25,87 +62,226 @@ class ConversationManager:
             "results": results,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         })
+        self.context.add(tool_name, query, results, film)
 
     def get_context_from_history(self) -> str:
-        context_parts = []
-
-        for entry in self.history:
-            if entry["role"] == "tool" and "results" in entry:
-                tool_results = entry["results"].get("results", [])
-                if tool_results:
-                    context_parts.append(
-                        f"Search results for '{entry['query']}' using {entry['tool']}:"
-                    )
-
-                    if entry["tool"] == "DuckDuckGo Search":
-                        for i, result in enumerate(tool_results, 1):
-                            context_parts.append(
-                                f"{i}. {result.get('title', '')}\n"
-                                f"   {result.get('snippet', '')}\n"
-                            )
-
-                    elif entry["tool"] == "OMDB Search":
-                        for i, result in enumerate(tool_results, 1):
-                            context_parts.append(
-                                f"{i}. {result.get('title', '')} ({result.get('year', '')})\n"
-                                f"   IMDB Rating: {result.get('rating', 'N/A')}\n"
-                                f"   Genre: {result.get('genre', '')}\n"
-                                f"   Director: {result.get('director', '')}\n"
-                                f"   Actors: {result.get('actors', '')}\n"
-                                f"   Plot: {result.get('plot', '')}\n"
-                                f"   IMDB: {result.get('imdbLink', '')}\n"
-                            )
-
-                    elif entry["tool"] == "YouTube Search":
-                        for i, result in enumerate(tool_results, 1):
-                            context_parts.append(
-                                f"{i}. {result.get('title', '')}\n"
-                                f"   {result.get('description', '')}\n"
-                                f"   Link: {result.get('link', '')}\n"
-                            )
-
-        return "\n".join(context_parts)
-
-    def process_query(self, query: str) -> Tuple[str, Dict[str, Any]]:
-        self.add_message("user", query)
+        return self.context.render()
+
+    def describe_film(self, film: str) -> Optional[str]:
+        # film is an imdbID when the query resolved, else a normalized title
+        entity = self.entities.get(film)
+        return entity.digest() if entity is not None else None
+
+    # --------------------------------------------------------
+    # Tool calls (cached, single-flight)
+    # --------------------------------------------------------
+    def plan(self, query: str,
+             max_cost: Optional[int] = None) -> Tuple[Optional[Entity], List[Tuple[str, SearchTool, str, Tuple[str, str]]]]:
+        # a film we already know is looked up, and cached, by its imdbID
+        title = guess_title(query)
+        entity = self.entities.resolve(title)
+        if entity is not None:
+            title = entity.title
+
+        # the cheapest registered tool of each kind, metadata first so its
+        # records seed the entity index the others resolve against
+        steps = []
+        for tool in self.registry.select(max_cost=max_cost):
+            tool_query = tool.build_query(title)
+            steps.append((tool.kind, tool, tool_query, self.cache_key(tool.name, tool_query, entity)))
+        return entity, steps
+
+    @staticmethod
+    def cache_key(tool_name: str, tool_query: str, entity: Optional[Entity] = None) -> Tuple[str, str]:
+        if entity is not None:
+            return tool_name, entity.imdb_id
+        return tool_name, tool_query.lower()
+
+    def call_tool(self, tool: SearchTool, tool_query: str,
+                  token: Optional[CancellationToken] = None,
+                  key: Optional[Tuple[str, str]] = None,
+                  refresh: bool = False, source: str = "user",
+                  title: Optional[str] = None) -> Dict[str, Any]:
+        # refresh=True skips the cached value (used by the background refresher);
+        # title is the asking query's normalized title, for analytics
+        key = key or self.cache_key(tool.name, tool_query)
+        if title is None:
+            title = normalize_title(guess_title(tool_query))
+        started = time.perf_counter()
+        outcome = "refresh" if refresh else "miss"
+
+        while True:
+            cached = None if refresh else self.cached(key)
+            if cached is not None:
+                self._record_tool(tool.name, title, source, outcome if outcome == "wait" else "hit", started)
+                return cached
+
+            with self.inflight_lock:
+                pending = self.inflight.get(key)
+                if pending is None:
+                    pending = self.inflight[key] = threading.Event()
+                    if outcome == "wait":
+                        outcome = "miss"
+                    break
+
+            # someone (usually a prefetch) is already fetching this; wait for it
+            while not pending.wait(0.1):
+                check(token)
+            refresh = False
+            outcome = "wait"
+
+        try:
+            results = tool.search(tool_query, token)
+            if self.cpu_pool is not None:
+                self.entities.ingest(results, self.cpu_pool.annotate(self.entities, results))
+            else:
+                self.entities.ingest(annotate_results(results))
+            if not results.get("error"):
+                if refresh:
+                    self.catalogue.set(key, results)
+                    self.cache.pop(key)
+                else:
+                    self.cache.set(key, results)
+            self._record_tool(tool.name, title, source, outcome, started, results)
+            return results
+        finally:
+            with self.inflight_lock:
+                self.inflight.pop(key, None)
+            pending.set()
+
+    def cached(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        results = self.cache.get(key)
+        return results if results is not None else self.catalogue.get(key)
+
+    def _record_tool(self, tool_name: str, title: str, source: str, outcome: str,
+                     started: float, results: Optional[Dict[str, Any]] = None):
+        if self.analytics is None:
+            return
+        if results is None:
+            size = 0
+        elif "payload_bytes" in results:
+            size = results["payload_bytes"]
+        else:
+            size = len(json.dumps(results, separators=(",", ":"), default=dict))
+        self.analytics.record(
+            "tool", tool_name, title, source, outcome,
+            (time.perf_counter() - started) * 1000, size
+        )
+
+    def run_plan(self, query: str, token: Optional[CancellationToken] = None,
+                 source: str = "user", max_cost: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        entity, steps = self.plan(query, max_cost)
+        # tool rows share the title of the query rows they belong to
+        title = normalize_title(guess_title(query))
+
+        fetched = {}
+        for key, tool, tool_query, cache_key in steps:
+            check(token)
+            fetched[key] = (tool, tool_query, self.call_tool(tool, tool_query, token, cache_key,
+                                                             source=source, title=title))
+
+        if entity is None:
+            self.alias_results(query, fetched.values())
+
+        return fetched
+
+    def alias_results(self, query: str, fetched, cache: Optional[TTLCache] = None) -> Optional[Entity]:
+        # first sighting of this film: move the results to its imdbID key, which
+        # is what plan() looks this and any differently worded follow-up up by
+        cache = cache if cache is not None else self.cache
+        entity = self.entities.resolve(guess_title(query))
+        if entity is not None:
+            for tool, tool_query, results in fetched:
+                if not results.get("error"):
+                    cache.set(self.cache_key(tool.name, tool_query, entity), results)
+                    cache.pop(self.cache_key(tool.name, tool_query))
+        return entity
+
+    def prefetch(self, text: str, token: Optional[CancellationToken] = None):
+        # Warms the tool cache only; nothing is added to the history. The text
+        # is still being typed, so only once it names a known film or looks
+        # like a title at all, and only the cheap tools. Google (100 free
+        # queries/day) is left for submitted queries.
+        title = guess_title(text)
+        if self.entities.resolve(title) is None and not plausible_title(title):
+            return
+
+        _, steps = self.plan(text, max_cost=COST_LOW)
+        if any(self.cached(step[3]) is None for step in steps):
+            if not self.prefetch_limiter.try_acquire():
+                return
+            self.run_plan(text, token, source="prefetch", max_cost=COST_LOW)
+
+        # the trailer too, once the text resolves to a known film (often
+        # thanks to the metadata lookup just made)
+        entity, steps = self.plan(text)
+        if entity is None:
+            return
+        for _, tool, tool_query, key in steps:
+            if tool.kind == "video" and self.cached(key) is None and self.video_prefetch_limiter.try_acquire():
+                check(token)
+                self.call_tool(tool, tool_query, token, key, source="prefetch",
+                               title=normalize_title(title))
+
+    def process_query(self, query: str, token: Optional[CancellationToken] = None) -> Tuple[str, Dict[str, Any]]:
+        # Nothing is recorded until the query completes, so a cancelled or
+        # superseded query leaves no partial turn behind in the history.
+        with self.lock:
+            # prior turns only; the new query is sent as the final user message
+            turns = self.window.messages()
+
+        started = time.perf_counter()
+        title = normalize_title(guess_title(query))
+        with self.lock:
+            self.popularity[title] += 1
 
         tool_results = {}
+        calls = []
+
+        # ---- Silent tool calls (served from the cache when prefetched) ----
+        for kind, (tool, tool_query, results) in self.run_plan(query, token).items():
+            # e.g. keep only the best trailer; cached results are shared, so copy
+            limit = tool.schema.max_results
+            if limit is not None and len(results.get("results", [])) > limit:
+                results = dict(results, results=results["results"][:limit])
+
+            calls.append((tool.name, tool_query, results))
+            tool_results[kind] = results
 
-        # ---- DuckDuckGo Search (silent tool call) ----
-        search_tool = self.tools.get("DuckDuckGo Search")
-        if search_tool:
-            imdb_query = f"{query} imdb rating release date director starring"
-            search_results = search_tool.search(imdb_query)
-            self.add_tool_call(search_tool.name, imdb_query, search_results)
-            tool_results["search"] = search_results
-
-        # ---- YouTube Search (silent tool call) ----
-        youtube_tool = self.tools.get("YouTube Search")
-        youtube_results = {"results": []}
-
-        if youtube_tool:
-            trailer_query = f"{query} trailer"
-            youtube_results = youtube_tool.search(trailer_query)
-
-            # keep only one best result
-            if youtube_results.get("results") and len(youtube_results["results"]) > 1:
-                youtube_results["results"] = [youtube_results["results"][0]]
-
-            self.add_tool_call(youtube_tool.name, trailer_query, youtube_results)
-            tool_results["youtube"] = youtube_results
-
-        # ---- Add simple trailer message (not debug) ----
-        if youtube_results.get("results"):
-            trailer = youtube_results["results"][0]
-            self.add_message(
-                "assistant",
-                f"Here is the trailer for {query}: {trailer.get('link', '')}"
-            )
+        video_results = tool_results.get("video", {"results": []})
+        # groups this turn's tool context with earlier turns about the same film
+        entity = self.entities.resolve(guess_title(query))
+        film = entity.imdb_id if entity is not None else title
 
         # ---- Build context & get LLM response ----
-        context = self.get_context_from_history()
-        response = self.llm.generate_response(query, context)
+        with self.lock:
+            context = self.context.render(calls)
+        llm_started = time.perf_counter()
+        response = self.llm.generate_response(query, context, turns, token)
+        check(token)
+
+        if self.analytics is not None:
+            now = time.perf_counter()
+            # per-thread outcome of the call just made on this thread (CallOutcome)
+            tokens_in, tokens_out = self.llm.last_usage
+            self.analytics.record("llm", self.llm.model, title, "user", getattr(self.llm, "last_cache", ""),
+                                  (now - llm_started) * 1000, len(context), tokens_in, tokens_out)
+            self.analytics.record("query", "", title, "user", "",
+                                  (now - started) * 1000, len(response), tokens_in, tokens_out)
+
+        with self.lock:
+            self.add_message("user", query)
+            for call in calls:
+                self.add_tool_call(*call, film=film)
+
+            # ---- Add simple trailer message (not debug) ----
+            if video_results.get("results"):
+                trailer = video_results["results"][0]
+                self.add_message(
+                    "assistant",
+                    f"Here is the trailer for {query}: {trailer.get('link', '')}"
+                )
 
-        self.add_message("assistant", response)
+            self.add_message("assistant", response)
 
         return response, tool_results
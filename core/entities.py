@@ -0,0 +1,218 @@
+import difflib
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# -------------------------------------------------------------------
+# Entity resolution: every tool result -> canonical imdbID
+# -------------------------------------------------------------------
+# OMDB records seed a local index (imdbID, title, year). Web results are
+# resolved from the IMDB link when they carry one, everything else (trailer
+# titles, user queries) by fuzzy title + year matching against the index.
+# ConversationManager uses the resolved film as a cache key, and the few
+# fields merged into it below are what the context keeps for a film once
+# its tool tables are folded (core.context).
+
+IMDB_ID = re.compile(r"\b(tt\d{7,9})\b")
+_YEAR = re.compile(r"[\(\[]?\b((?:19|20)\d{2})\b[\)\]]?")
+_NOISE = re.compile(
+    r"\b(?:official|main|final|teaser|trailer|clip|hd|4k|imdb|wikipedia|rotten tomatoes"
+    r"|full movie|movie|film|review|cast)\b",
+    re.IGNORECASE
+)
+_SEPARATOR = re.compile(r"\s+[-–—|:]\s+.*$")
+_PUNCT = re.compile(r"[^\w\s]")
+
+MATCH_CUTOFF = 0.85
+
+# merged per film from OMDB records and snippet facts, in digest order
+DIGEST_FIELDS = ("rating", "genre", "director", "actors", "cast", "release_date", "runtime", "box_office")
+
+# a leading article, which a year may stand in for ("Batman (2022)")
+_ARTICLE = re.compile(r"^(?:the|a|an) ")
+
+# numbers and roman numerals tell sequels apart ("toy story 3", "rocky ii")
+_MARKERS = re.compile(r"\b(?:\d+|[ivx]{1,5})\b")
+
+
+def close_enough(query: str, title: str) -> bool:
+    # fuzzy matching is for typos and punctuation, never for a different film:
+    # titles whose sequel markers differ, or where one title merely extends
+    # the other ("alien" / "aliens", "toy story" / "toy story 3"), never match
+    if _MARKERS.findall(query) != _MARKERS.findall(title):
+        return False
+    if query.startswith(title) or title.startswith(query):
+        return False
+    matcher = difflib.SequenceMatcher(None, query, title)
+    return (matcher.real_quick_ratio() >= MATCH_CUTOFF and matcher.quick_ratio() >= MATCH_CUTOFF
+            and matcher.ratio() >= MATCH_CUTOFF)
+
+
+def journal_pattern(title: str) -> "re.Pattern[bytes]":
+    # matches the EntityIndex.journal() lines whose title might pass
+    # close_enough(title, ...): the same sequel markers, and a length (in
+    # UTF-8 bytes, so loosely) the ratio cutoff allows. Groups: title, year, id
+    lo = int(len(title) * MATCH_CUTOFF / (2 - MATCH_CUTOFF))
+    hi = int(len(title) * (2 - MATCH_CUTOFF) / MATCH_CUTOFF) + 1
+    markers = "".join(rf"(?=[^\t\n]*\b{marker}\b)" for marker in _MARKERS.findall(title))
+    return re.compile(rf"\n{markers}([^\t\n]{{{lo},{4 * hi}}})\t([^\t\n]*)\t([^\n]*)".encode())
+
+
+def journal_article_pattern(title: str) -> "re.Pattern[bytes]":
+    # the journal lines whose title is `title` give or take a leading article
+    bare = re.escape(_ARTICLE.sub("", title).encode("utf-8"))
+    return re.compile(rb"\n((?:(?:the|a|an) )?" + bare + rb")\t([^\t\n]*)\t([^\n]*)")
+
+
+def pick(candidates: List[Tuple[str, str]], year: Optional[str]) -> Optional[str]:
+    # (imdb_id, year) candidates; only an unambiguous match counts
+    if year is not None:
+        candidates = [c for c in candidates if c[1].startswith(year)]
+    ids = {imdb_id for imdb_id, _ in candidates}
+    return ids.pop() if len(ids) == 1 else None
+
+
+def match_title(title: str, year: Optional[str], by_title: Dict[str, List[str]],
+                year_of: Callable[[str], str]) -> Optional[str]:
+    # exact normalized title first, then close matches
+    ids = by_title.get(title)
+    if ids is None:
+        ids = [imdb_id for other in by_title if close_enough(title, other) for imdb_id in by_title[other]]
+    found = pick([(imdb_id, year_of(imdb_id)) for imdb_id in ids], year)
+    if found is None and year is not None:
+        # with a year to tell them apart, "batman" 2022 may be "the batman"
+        bare = _ARTICLE.sub("", title)
+        ids = [imdb_id for other in by_title if _ARTICLE.sub("", other) == bare for imdb_id in by_title[other]]
+        found = pick([(imdb_id, year_of(imdb_id)) for imdb_id in ids], year)
+    return found
+
+
+def parse_title(text: str) -> Tuple[str, Optional[str]]:
+    year_match = _YEAR.search(text)
+    year = year_match.group(1) if year_match else None
+    return normalize_title(text), year
+
+
+def normalize_title(text: str) -> str:
+    text = _NOISE.sub(" ", _SEPARATOR.sub("", text))
+    without_year = _YEAR.sub(" ", text)
+    if without_year.strip():
+        # keep the number when it is the whole title ("1917")
+        text = without_year
+    # the article stays: "The Batman" and "Batman" are different films
+    return " ".join(_PUNCT.sub(" ", text.lower()).split())
+
+
+def _journal_line(title: str, year: str, imdb_id: str) -> bytes:
+    return f"{title}\t{year}\t{imdb_id}\n".encode("utf-8")
+
+
+class Entity:
+    def __init__(self, imdb_id: str, title: str, year: str):
+        self.imdb_id = imdb_id
+        self.title = title
+        self.year = year
+        self.fields: Dict[str, str] = {}
+
+    def merge(self, values: Dict[str, Any]):
+        # first source wins: OMDB records are ingested before web results
+        for key in DIGEST_FIELDS:
+            value = values.get(key)
+            if value and value != "N/A" and key not in self.fields:
+                self.fields[key] = str(value)
+
+    def digest(self) -> str:
+        name = f"{self.title} ({self.year})" if self.year else self.title
+        if not self.fields:
+            return name
+        return name + ": " + "; ".join(f"{key}={self.fields[key]}" for key in DIGEST_FIELDS if key in self.fields)
+
+    def __repr__(self):
+        return f"Entity({self.imdb_id!r}, {self.title!r}, {self.year!r})"
+
+
+class EntityIndex:
+    def __init__(self):
+        self.entities: Dict[str, Entity] = {}
+        self.by_title: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        # append-only mirror of the title index for worker processes
+        self._journal = None
+        self.journal_path: Optional[str] = None
+        self.journal_size = 0
+
+    def get(self, imdb_id: str) -> Optional[Entity]:
+        return self.entities.get(imdb_id)
+
+    def add(self, imdb_id: str, title: str, year: str) -> Entity:
+        with self._lock:
+            entity = self.entities.get(imdb_id)
+            if entity is None:
+                entity = self.entities[imdb_id] = Entity(imdb_id, title, year)
+                key = normalize_title(title)
+                self.by_title.setdefault(key, []).append(imdb_id)
+                if self._journal is not None:
+                    self._append(_journal_line(key, year, imdb_id))
+            return entity
+
+    def resolve(self, text: str) -> Optional[Entity]:
+        title, year = parse_title(text)
+        if not title:
+            return None
+
+        with self._lock:
+            imdb_id = match_title(title, year, self.by_title, lambda i: self.entities[i].year)
+            return self.entities[imdb_id] if imdb_id else None
+
+    def journal(self, path: str) -> Tuple[str, int]:
+        # mirrors the title index to `path` for core.workers: a newline, then
+        # one "title\tyear\timdbID\n" line per film, appended as films are
+        # added so readers can search the file in place; returns (path, size)
+        with self._lock:
+            if path != self.journal_path:
+                if self._journal is not None:
+                    self._journal.close()
+                self._journal = open(path, "wb")
+                self.journal_path = path
+                self.journal_size = 0
+                self._append(b"\n" + b"".join(
+                    _journal_line(title, self.entities[imdb_id].year, imdb_id)
+                    for title, ids in self.by_title.items() for imdb_id in ids
+                ))
+            return self.journal_path, self.journal_size
+
+    def _append(self, data: bytes):
+        self._journal.write(data)
+        self._journal.flush()
+        self.journal_size += len(data)
+
+    def ingest(self, results: Dict[str, Any],
+               matched: Optional[List[Optional[str]]] = None) -> Dict[str, Any]:
+        # matched: title matches already computed per result (core.workers)
+        top = None
+        for i, result in enumerate(results.get("results", [])):
+            entity = None
+
+            imdb_id = result.get("imdbID")
+            if imdb_id and result.get("title"):
+                entity = self.add(imdb_id, result["title"], result.get("year", ""))
+            else:
+                link_id = IMDB_ID.search(result.get("link", ""))
+                if link_id:
+                    # trust the link; an unknown ID is not guessed from the title
+                    entity = self.get(link_id.group(1))
+                elif matched is not None:
+                    entity = self.get(matched[i]) if matched[i] else None
+                else:
+                    entity = self.resolve(result.get("title", ""))
+
+            if entity is not None:
+                entity.merge(result)
+                top = top or entity
+
+        # snippet facts (core.extract) describe the top-ranked film
+        if top is not None and results.get("facts"):
+            top.merge(results["facts"])
+
+        return results
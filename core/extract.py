@@ -0,0 +1,51 @@
+import re
+from typing import Dict, Iterable
+
+
+# -------------------------------------------------------------------
+# Single-pass fact extraction from web result snippets
+# -------------------------------------------------------------------
+# One precompiled alternation scans each snippet once. Every branch holds
+# exactly one named group, so `match.lastgroup` names the fact that was
+# found. The first value seen for a fact wins.
+
+_WORD = r"[A-Z](?:[\w'\-]+|\.)"
+_NAME = _WORD + r"(?: " + _WORD + r"){0,3}"
+
+_FACTS = re.compile(
+    # cheap guard: only try the branches at a word start with a plausible first char
+    r"(?:(?<=\W)|^)(?=[\d$RrDdWwSsCcBbGgEe])(?:"
+    r"(?P<rating>(?:10|\d(?:\.\d)?)/10)\b"
+    r"|(?i:released?(?: date)?:? (?:on |in )?)(?P<release_date>[A-Z][a-z]+ \d{1,2}, \d{4}|\d{1,2} [A-Z][a-z]+ \d{4})"
+    r"|(?P<runtime>\d ?h(?:ours?)? ?\d{1,2} ?m(?:in(?:utes)?)?|\d{2,3} ?min(?:utes|s)?)\b"
+    r"|(?i:box office|gross(?:ed|ing)?|earned)\W{0,3}(?:[\w ]{0,25}?)(?P<box_office>\$ ?\d[\d,.]*(?: ?(?:million|billion|[MB])\b)?)"
+    r"|(?i:directed by|director:) (?P<director>" + _NAME + r")"
+    r"|(?i:with|starring|stars:?|cast:) (?P<cast>" + _NAME + r"(?:, " + _NAME + r"){0,3})"
+    r")"
+)
+
+FACT_NAMES = ("rating", "release_date", "runtime", "box_office", "director", "cast")
+
+
+def extract_facts(snippets: Iterable[str]) -> Dict[str, str]:
+    facts = {}
+    for snippet in snippets:
+        if not snippet:
+            continue
+        for match in _FACTS.finditer(snippet):
+            name = match.lastgroup
+            if name not in facts:
+                facts[name] = match.group(name)
+        if len(facts) == len(FACT_NAMES):
+            break
+    return facts
+
+
+def annotate_results(results: Dict) -> Dict:
+    # stores the facts on the tool result itself, once, when it arrives
+    snippets = [r.get("snippet", "") for r in results.get("results", [])]
+    if any(snippets):
+        facts = extract_facts(snippets)
+        if facts:
+            results["facts"] = facts
+    return results
@@ -0,0 +1,58 @@
+from collections import deque
+from typing import List, Dict
+
+
+# -------------------------------------------------------------------
+# Sliding window of chat turns with a rolling summary
+# -------------------------------------------------------------------
+# The last `max_turns` user/assistant messages are sent verbatim. Anything
+# older is folded, once, into a short line-per-message summary that is
+# capped at `max_summary_chars`, so the per-turn input stays roughly
+# constant no matter how long the session runs.
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    for mark in (". ", "! ", "? "):
+        cut = text.find(mark)
+        if 0 < cut < limit:
+            return text[:cut + 1]
+    if len(text) > limit:
+        return text[:limit - 3].rstrip() + "..."
+    return text
+
+
+class TurnWindow:
+    def __init__(self, max_turns: int = 6, max_summary_chars: int = 1200, line_chars: int = 160):
+        self.max_turns = max_turns
+        self.max_summary_chars = max_summary_chars
+        self.line_chars = line_chars
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.summary_chars = 0
+
+    def add(self, role: str, content: str):
+        self.turns.append({"role": role, "content": content})
+        while len(self.turns) > self.max_turns:
+            self._fold(self.turns.popleft())
+
+    def _fold(self, turn: Dict[str, str]):
+        speaker = "User" if turn["role"] == "user" else "Assistant"
+        line = f"- {speaker}: {_first_sentence(turn['content'], self.line_chars)}"
+        self.summary_lines.append(line)
+        self.summary_chars += len(line) + 1
+
+        while self.summary_chars > self.max_summary_chars and len(self.summary_lines) > 1:
+            self.summary_chars -= len(self.summary_lines.popleft()) + 1
+
+    def summary(self) -> str:
+        if not self.summary_lines:
+            return ""
+        return "Summary of earlier conversation:\n" + "\n".join(self.summary_lines)
+
+    def messages(self) -> List[Dict[str, str]]:
+        messages = []
+        summary = self.summary()
+        if summary:
+            messages.append({"role": "system", "content": summary})
+        messages.extend(dict(turn) for turn in self.turns)
+        return messages
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Callable, Optional, Tuple
+
+import requests
+
+from core.scheduler import QueryScheduler
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it no images are shown
+    Image = None
+
+
+# -------------------------------------------------------------------
+# Poster / thumbnail cache
+# -------------------------------------------------------------------
+# Raw image bytes live on disk, content addressed by SHA-256:
+#
+#   <root>/blobs/ab/abcdef...   image bytes
+#   <root>/urls/12/123456...    text file holding the blob hash for a URL
+#
+# Decoded, downscaled images are kept in a small in-memory LRU. Fetching,
+# decoding and downscaling all happen on background workers; callers get
+# the PIL image through a callback and convert it on the Tk thread.
+
+REQUEST_TIMEOUT = 10
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageStore:
+    def __init__(self, root: str, max_decoded: int = 64, max_workers: int = 2):
+        self.root = root
+        self.max_decoded = max_decoded
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = QueryScheduler(max_workers=max_workers)
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _path(self, kind: str, digest: str) -> str:
+        return os.path.join(self.root, kind, digest[:2], digest)
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def fetch_bytes(self, url: str) -> bytes:
+        url_path = self._path("urls", _sha256(url.encode("utf-8")))
+        if os.path.exists(url_path):
+            with open(url_path, encoding="ascii") as f:
+                blob_path = self._path("blobs", f.read().strip())
+            if os.path.exists(blob_path):
+                with open(blob_path, "rb") as f:
+                    return f.read()
+
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.content
+
+        digest = _sha256(data)
+        blob_path = self._path("blobs", digest)
+        if not os.path.exists(blob_path):
+            self._write(blob_path, data)
+        self._write(url_path, digest.encode("ascii"))
+        return data
+
+    def _cached(self, key: Tuple[str, int, int]) -> Optional[Any]:
+        with self._lock:
+            image = self._decoded.get(key)
+            if image is not None:
+                self._decoded.move_to_end(key)
+            return image
+
+    def _remember(self, key: Tuple[str, int, int], image: Any):
+        with self._lock:
+            self._decoded[key] = image
+            self._decoded.move_to_end(key)
+            while len(self._decoded) > self.max_decoded:
+                self._decoded.popitem(last=False)
+
+    def load(self, url: str, size: Tuple[int, int], callback: Callable[[Any], None]):
+        # callback(image) runs on a worker thread; it is not called on failure
+        if not self.available or not url or url == "N/A":
+            return
+
+        key = (url, size[0], size[1])
+        cached = self._cached(key)
+        if cached is not None:
+            callback(cached)
+            return
+
+        def work(token):
+            data = self.fetch_bytes(url)
+            token.raise_if_cancelled()
+            with Image.open(BytesIO(data)) as img:
+                img.thumbnail(size)
+                image = img.convert("RGB")
+            self._remember(key, image)
+            return image
+
+        self._workers.submit(
+            work,
+            priority=5,
+            on_done=lambda image, error: callback(image) if error is None else None
+        )
+
+    def shutdown(self):
+        self._workers.shutdown()
@@ -1,9 +1,49 @@
 import os
+import threading
+import time
 from groq import Groq
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
+from core.scheduler import CancellationToken, QueryCancelled, check
+from core.completions import CompletionCache, completion_key
 
-class LLMClient:
+# Kept constant so the system message is a stable, cacheable prompt prefix.
+SYSTEM_PROMPT = (
+    "You are a helpful research assistant who can help users find information about movies, TV shows, and other topics.\n"
+    "When providing information about movies or shows, include IMDB ratings, release dates, "
+    "and other relevant details from the context if available.\n"
+    "Use today's date and use data from the context.\n"
+    "Context is given as tables: a '[tool] query' line, a 'field|field' header, then one row per result."
+)
+
+class CallOutcome:
+    # last_usage and last_cache describe the latest call made on the calling
+    # thread: one client serves several scheduler workers at once, so a
+    # plain attribute could hand one query another query's tokens or hit
     def __init__(self):
+        self._outcome = threading.local()
+
+    @property
+    def last_usage(self) -> Tuple[int, int]:
+        # (prompt_tokens, completion_tokens)
+        return getattr(self._outcome, "usage", (0, 0))
+
+    @last_usage.setter
+    def last_usage(self, usage: Tuple[int, int]):
+        self._outcome.usage = usage
+
+    @property
+    def last_cache(self) -> str:
+        # "hit" | "miss" | "bypass" | "" (no cache)
+        return getattr(self._outcome, "cache", "")
+
+    @last_cache.setter
+    def last_cache(self, outcome: str):
+        self._outcome.cache = outcome
+
+
+class LLMClient(CallOutcome):
+    def __init__(self, cache: Optional[CompletionCache] = None, cache_bypass: bool = False):
+        super().__init__()
         self.api_key = os.getenv("GROQ_API_KEY")
         
         if not self.api_key:
@@ -11,29 +51,87 @@ class LLMClient:
             
         self.client = Groq(api_key=self.api_key)
         self.model = "llama-3.1-8b-instant"
+        self.params = {"max_tokens": 1000}
+
+        # exact-prompt completion cache; bypass still stores fresh answers
+        self.cache = cache
+        self.cache_bypass = cache_bypass
     
     def set_model(self, model_name: str):
         self.model = model_name
+
+    def _record_usage(self, usage):
+        if usage is not None:
+            self.last_usage = (getattr(usage, "prompt_tokens", 0) or 0,
+                               getattr(usage, "completion_tokens", 0) or 0)
+
+    @staticmethod
+    def build_messages(prompt: str, system_prompt: str,
+                       history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": prompt})
+        return messages
     
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> str:
+    def generate_response(self, prompt: str, context: Optional[str] = None,
+                          history: Optional[List[Dict[str, str]]] = None,
+                          token: Optional[CancellationToken] = None) -> str:
         try:
-            system_prompt = """You are a helpful research assistant who can help users find information about movies, TV shows, and other topics.
-            When providing information about movies or shows, include IMDB ratings, release dates, 
-            and other relevant details from the context if available.
-            Use today's date and use data from the context."""
+            system_prompt = SYSTEM_PROMPT
             
             if context:
                 system_prompt += f"\n\nHere is additional context from searches:\n{context}"
             
+            messages = self.build_messages(prompt, system_prompt, history)
+            check(token)
+
+            key = None
+            self.last_cache = ""
+            if self.cache is not None:
+                key = completion_key(self.model, messages, self.params)
+                self.last_cache = "bypass" if self.cache_bypass else "miss"
+                cached = None if self.cache_bypass else self.cache.get(key)
+                if cached is not None:
+                    # nothing was spent on this answer
+                    self.last_cache = "hit"
+                    self.last_usage = (0, 0)
+                    return cached["response"]
+
+            started = time.perf_counter()
+            self.last_usage = (0, 0)
+            content = self._complete(messages, token)
+            if key is not None and content:
+                self.cache.set(key, content, self.last_usage, time.perf_counter() - started, self.model)
+            return content
+        except QueryCancelled:
+            raise
+        except Exception as e:
+            return f"Error generating response: {str(e)}"
+
+    def _complete(self, messages: List[Dict[str, str]], token: Optional[CancellationToken] = None) -> str:
+        if token is None:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000
+                messages=messages,
+                **self.params
             )
-            
+            self._record_usage(getattr(response, "usage", None))
             return response.choices[0].message.content
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
\ No newline at end of file
+
+        # stream so a cancelled query stops consuming tokens mid-answer
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **self.params
+        )
+        parts = []
+        for chunk in stream:
+            check(token)
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            # Groq reports usage on the final chunk
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None:
+                self._record_usage(getattr(x_groq, "usage", None))
+        return "".join(parts)
\ No newline at end of file
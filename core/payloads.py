@@ -0,0 +1,50 @@
+import json
+from collections.abc import Mapping
+from typing import Any, Iterator, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: a faster parser when installed
+    orjson = None
+
+
+# -------------------------------------------------------------------
+# Compact, immutable tool result records
+# -------------------------------------------------------------------
+# Each HTTP response is decoded once, with orjson when installed, and only
+# the fields a tool declares are copied out into Record objects: immutable,
+# slot-based mappings whose key tuple is shared by every record of the same
+# shape. The decoded tree and the raw bytes are dropped straight away, so a
+# long session keeps just the values it shows and serializes.
+
+def loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class Record(Mapping):
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: Tuple[str, ...], values: Tuple[Any, ...]):
+        object.__setattr__(self, "_keys", keys)
+        object.__setattr__(self, "_values", values)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Record is immutable")
+
+    def __repr__(self):
+        return f"Record({dict(self)!r})"
@@ -0,0 +1,128 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from core.cache import TTLCache
+from core.entities import normalize_title
+from core.registry import COST_FREE, COST_LOW, COST_MEDIUM, COST_HIGH
+from core.scheduler import CancellationToken, QueryCancelled, RateLimiter
+
+
+# -------------------------------------------------------------------
+# Catalogue warm-up and background cache refresh
+# -------------------------------------------------------------------
+# Keeps the tool results for a known list of titles warm in their own cache
+# partition (ConversationManager.catalogue), sized for the catalogue and
+# with a long TTL, so they neither evict nor get evicted by user queries.
+# Every cycle, each catalogue lookup that is missing or within `margin` of
+# expiring is fetched again, most-asked titles first, as long as that
+# provider's rate budget allows. Lookups that do not fit the budget wait
+# for a later cycle.
+
+CATALOGUE_TTL = 24 * 3600
+
+# HTTP requests per hour (rate, burst) by declared tool cost; a lookup
+# takes the tool's `requests_per_call` of them. At these rates a full day
+# of refreshing uses about a quarter of each free tier:
+#   OMDB (LOW, 4 requests/lookup) 10/h = 240 of 1000 requests/day = 60 lookups
+#   Google CSE (MEDIUM)            1/h =  24 of 100 queries/day   = 24 lookups
+#   YouTube search (HIGH)          1/h =  24 calls = 2,400 of 10,000 units/day
+# With a 24h TTL, Google and YouTube limit a full refresh to 24 titles a day.
+COST_BUDGETS = {
+    COST_FREE: (30, 5),
+    COST_LOW: (10, 4),
+    COST_MEDIUM: (1, 1),
+    COST_HIGH: (1, 1),
+}
+
+
+def load_catalogue(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+class CatalogueRefresher:
+    def __init__(self, conversation, titles: Iterable[str],
+                 budgets: Optional[Dict[str, tuple]] = None,
+                 ttl: float = CATALOGUE_TTL, margin: float = 2 * 3600, interval: float = 60):
+        self.conversation = conversation
+        self.titles = list(dict.fromkeys(titles))
+        self.margin = margin
+        self.interval = interval
+
+        # one entry per catalogue title and tool kind
+        kinds = len(conversation.registry.select()) or 1
+        conversation.catalogue = TTLCache(max_entries=len(self.titles) * kinds, ttl=ttl)
+
+        # per tool name overrides; otherwise the budget follows the tool's cost
+        self.budgets = budgets or {}
+        self.limiters: Dict[str, RateLimiter] = {}
+
+        self._token = CancellationToken()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._token.cancel()
+
+    def _limiter(self, tool) -> RateLimiter:
+        limiter = self.limiters.get(tool.name)
+        if limiter is None:
+            per_hour, burst = self.budgets.get(tool.name) or COST_BUDGETS.get(tool.cost, COST_BUDGETS[COST_HIGH])
+            # a burst below one lookup's requests would never let a lookup through
+            burst = max(burst, self._requests(tool))
+            limiter = self.limiters[tool.name] = RateLimiter(rate=per_hour / 3600, burst=burst)
+        return limiter
+
+    @staticmethod
+    def _requests(tool) -> int:
+        return getattr(tool, "requests_per_call", 1)
+
+    def ordered_titles(self) -> List[str]:
+        popularity = self.conversation.popularity
+        # stable sort: equally popular titles keep catalogue order
+        return sorted(self.titles, key=lambda t: -popularity[normalize_title(t)])
+
+    def refresh_once(self) -> int:
+        refreshed = 0
+        exhausted = set()
+
+        for title in self.ordered_titles():
+            entity, steps = self.conversation.plan(title)
+            fetched = []
+            for _, tool, tool_query, key in steps:
+                self._token.raise_if_cancelled()
+
+                remaining = self.conversation.catalogue.expires_in(key)
+                if remaining is not None and remaining > self.margin:
+                    continue
+                if tool.name in exhausted:
+                    continue
+
+                if not self._limiter(tool).try_acquire(self._requests(tool)):
+                    exhausted.add(tool.name)
+                    continue
+
+                results = self.conversation.call_tool(tool, tool_query, self._token, key, refresh=True,
+                                                       source="refresh", title=normalize_title(title))
+                fetched.append((tool, tool_query, results))
+                refreshed += 1
+
+            if entity is None and fetched:
+                self.conversation.alias_results(title, fetched, self.conversation.catalogue)
+
+        return refreshed
+
+    def _run(self):
+        while not self._token.cancelled:
+            try:
+                self.refresh_once()
+            except QueryCancelled:
+                return
+            except Exception as e:
+                print(f"Warning: catalogue refresh failed: {e}")
+
+            self._token.wait(self.interval)
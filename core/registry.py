@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# -------------------------------------------------------------------
+# Declarative tool metadata
+# -------------------------------------------------------------------
+# Each SearchTool declares what it is for (kind), what its results look
+# like (ResultSchema: context fields and a display layout), how to phrase
+# its query, and what a call costs. The planner, context builder and
+# conversation view read these declarations instead of matching tool
+# names, so adding a tool means declaring it, not editing those modules.
+
+# what a tool contributes to an answer; planned in this order so movie
+# metadata seeds the entity index before web and video results resolve
+KIND_ORDER = ("metadata", "web", "video")
+
+# relative cost of one call (quota and money); the planner prefers cheaper
+COST_FREE = 0
+COST_LOW = 1
+COST_MEDIUM = 2
+COST_HIGH = 3
+
+# typical wall-clock class of one call; breaks cost ties in the planner
+LATENCY_FAST = "fast"      # a single HTTP request
+LATENCY_SLOW = "slow"      # several round trips or a heavyweight client
+
+
+class _Blank(dict):
+    def __missing__(self, key):
+        return ""
+
+
+class ResultSchema:
+    def __init__(self, fields: Tuple[str, ...], heading: str, item: str = "{title}",
+                 details: Tuple[str, ...] = (), link: Optional[str] = "link",
+                 image: Optional[Tuple[str, str]] = None, label: Optional[str] = None,
+                 facts: bool = False, numbered: bool = True, max_results: Optional[int] = None):
+        self.fields = fields            # columns serialized into the LLM context
+        self.heading = heading          # section header in the conversation view
+        self.item = item                # first line per result (format string)
+        self.details = details          # further lines per result (format strings)
+        self.link = link                # field rendered as a clickable link
+        self.image = image              # (field, "poster" | "thumbnail")
+        self.label = label              # tool header text, defaults to the tool name
+        self.facts = facts              # show facts extracted from snippets
+        self.numbered = numbered
+        self.max_results = max_results  # results kept per call
+
+    @staticmethod
+    def clean(value: Any) -> str:
+        text = " ".join(str(value or "").split())
+        return text.replace("|", "/")
+
+    def context_header(self) -> str:
+        return "|".join(self.fields)
+
+    def context_row(self, result: Dict[str, Any]) -> str:
+        return "|".join(self.clean(result.get(field, "")) for field in self.fields)
+
+    def format(self, template: str, result: Dict[str, Any]) -> str:
+        return template.format_map(_Blank(result))
+
+
+DEFAULT_SCHEMA = ResultSchema(fields=("title", "snippet"), heading="🔍 Results:", details=("{snippet}",))
+
+
+class ToolRegistry:
+    def __init__(self, tools: Iterable[Any] = ()):
+        self.tools: Dict[str, Any] = {}
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: Any):
+        self.tools[tool.name] = tool
+
+    def get(self, name: str) -> Optional[Any]:
+        return self.tools.get(name)
+
+    def schema(self, name: str) -> ResultSchema:
+        tool = self.tools.get(name)
+        return getattr(tool, "schema", DEFAULT_SCHEMA) if tool is not None else DEFAULT_SCHEMA
+
+    def pick(self, kind: str, max_cost: Optional[int] = None) -> Optional[Any]:
+        # cheapest registered tool of this kind, then the faster one;
+        # registration order breaks remaining ties
+        candidates = [
+            tool for tool in self.tools.values()
+            if tool.kind == kind and (max_cost is None or tool.cost <= max_cost)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda tool: (tool.cost, getattr(tool, "latency", LATENCY_FAST) == LATENCY_SLOW))
+
+    def select(self, kinds: Iterable[str] = KIND_ORDER, max_cost: Optional[int] = None) -> List[Any]:
+        selected = [self.pick(kind, max_cost) for kind in kinds]
+        return [tool for tool in selected if tool is not None]
+
+    def __iter__(self):
+        return iter(self.tools.values())
+
+    def __len__(self) -> int:
+        return len(self.tools)
@@ -0,0 +1,383 @@
+import argparse
+import atexit
+import itertools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then not reported
+    resource = None
+
+from core.analytics import _percentile
+from core.conversation import ConversationManager
+from core.llm import CallOutcome
+from core.payloads import Record
+from core.registry import ResultSchema
+from core.scheduler import CancellationToken, QueryCancelled, QueryScheduler
+from core.search import SearchTool
+
+
+# -------------------------------------------------------------------
+# Session recording
+# -------------------------------------------------------------------
+# A trace is a JSON-lines file. Offsets ("t") are seconds since the
+# recorder started:
+#
+#   {"event": "start", "version": 1, "wall": ...}
+#   {"event": "tool_info", "name", "kind", "cost", "latency", "query_template", "schema"}
+#   {"event": "query", "t", "text", "source"}            user query / prefetch
+#   {"event": "tool", "t", "tool", "query", "latency", "response"}
+#   {"event": "llm", "t", "model", "prompt", "context_chars", "turns",
+#    "latency", "response", "usage"}
+#
+# Enabled in the app with RECORD_TRACE; replayed with `python -m core.replay`.
+
+TRACE_VERSION = 1
+
+
+class Recorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._write({"event": "start", "version": TRACE_VERSION, "wall": time.time()})
+        atexit.register(self.close)
+
+    def _now(self) -> float:
+        return time.monotonic() - self._started
+
+    def _write(self, event: Dict[str, Any]):
+        line = json.dumps(event, ensure_ascii=False, default=dict)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def query(self, text: str, source: str = "user"):
+        self._write({"event": "query", "t": self._now(), "text": text, "source": source})
+
+    def tool(self, tool: SearchTool) -> "RecordingTool":
+        schema = {key: list(value) if isinstance(value, tuple) else value
+                  for key, value in vars(tool.schema).items()}
+        self._write({
+            "event": "tool_info", "name": tool.name, "kind": tool.kind, "cost": tool.cost,
+            "latency": tool.latency, "query_template": tool.query_template, "schema": schema,
+        })
+        return RecordingTool(self, tool)
+
+    def llm(self, llm) -> "RecordingLLM":
+        return RecordingLLM(self, llm)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingTool(SearchTool):
+    def __init__(self, recorder: Recorder, tool: SearchTool):
+        super().__init__(tool.name)
+        self.recorder = recorder
+        self.tool = tool
+        self.kind = tool.kind
+        self.schema = tool.schema
+        self.cost = tool.cost
+        self.latency = tool.latency
+        self.query_template = tool.query_template
+
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        started = self.recorder._now()
+        results = self.tool.search(query, token)
+        self.recorder._write({
+            "event": "tool", "t": started, "tool": self.name, "query": query,
+            "latency": self.recorder._now() - started, "response": results,
+        })
+        return results
+
+
+class RecordingLLM:
+    def __init__(self, recorder: Recorder, llm):
+        self.recorder = recorder
+        self.llm = llm
+
+    def __getattr__(self, name):
+        # model, last_usage, set_model, ... come from the wrapped client;
+        # last_usage/last_cache are per thread there (CallOutcome)
+        return getattr(self.llm, name)
+
+    def generate_response(self, prompt: str, context: Optional[str] = None,
+                          history: Optional[List[Dict[str, str]]] = None,
+                          token: Optional[CancellationToken] = None) -> str:
+        started = self.recorder._now()
+        response = self.llm.generate_response(prompt, context, history, token)
+        self.recorder._write({
+            "event": "llm", "t": started, "model": self.llm.model, "prompt": prompt,
+            "context_chars": len(context or ""), "turns": len(history or ()),
+            "latency": self.recorder._now() - started, "response": response,
+            "usage": list(self.llm.last_usage),
+        })
+        return response
+
+
+# -------------------------------------------------------------------
+# Fake providers
+# -------------------------------------------------------------------
+# Answer from the trace: the recorded response for the same (tool, query)
+# or prompt, after the recorded latency. Repeated requests cycle through
+# the recorded responses in order, so a replay is deterministic.
+
+def _sleep(seconds: float, token: Optional[CancellationToken]):
+    if token is None:
+        time.sleep(seconds)
+    elif token.wait(seconds):
+        raise QueryCancelled()
+
+
+class _Replies:
+    def __init__(self, replies: Dict[Any, list]):
+        self._replies = replies
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def next(self, key):
+        with self._lock:
+            self.requests += 1
+            replies = self._replies.get(key)
+            if not replies:
+                return None
+            cursor = self._cursors.setdefault(key, itertools.cycle(replies))
+            return next(cursor)
+
+    def latencies(self) -> List[float]:
+        return [reply[0] for replies in self._replies.values() for reply in replies]
+
+
+class FakeTool(SearchTool):
+    def __init__(self, info: Dict[str, Any], replies: _Replies, latency_scale: float = 1.0):
+        super().__init__(info["name"])
+        self.kind = info["kind"]
+        self.cost = info["cost"]
+        self.latency = info["latency"]
+        self.query_template = info["query_template"]
+        self.schema = ResultSchema(**{
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in info["schema"].items()
+        })
+        self.replies = replies
+        self.latency_scale = latency_scale
+        self._keys = {}
+        latencies = replies.latencies()
+        self.default_latency = _percentile(latencies, 50) if latencies else 0.0
+
+    def _record(self, result: Dict[str, Any]) -> Record:
+        # rebuilt as records with shared key tuples, like the real tools
+        keys = self._keys.setdefault(tuple(result), tuple(result))
+        return Record(keys, tuple(result.values()))
+
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        reply = self.replies.next(query.lower())
+        if reply is None:
+            _sleep(self.default_latency * self.latency_scale, token)
+            return {"tool": self.name, "query": query, "results": []}
+
+        latency, response = reply
+        _sleep(latency * self.latency_scale, token)
+        results = dict(response, query=query)
+        results["results"] = [self._record(result) for result in response.get("results", [])]
+        return results
+
+
+class FakeLLM(CallOutcome):
+    def __init__(self, model: str, replies: _Replies, latency_scale: float = 1.0):
+        super().__init__()
+        self.model = model
+        self.replies = replies
+        self.latency_scale = latency_scale
+        latencies = replies.latencies()
+        self.default_latency = _percentile(latencies, 50) if latencies else 0.0
+
+    def set_model(self, model_name: str):
+        self.model = model_name
+
+    def generate_response(self, prompt: str, context: Optional[str] = None,
+                          history: Optional[List[Dict[str, str]]] = None,
+                          token: Optional[CancellationToken] = None) -> str:
+        reply = self.replies.next(prompt)
+        if reply is None:
+            _sleep(self.default_latency * self.latency_scale, token)
+            self.last_usage = (0, 0)
+            return ""
+
+        latency, response, usage = reply
+        _sleep(latency * self.latency_scale, token)
+        self.last_usage = tuple(usage)
+        return response
+
+
+# -------------------------------------------------------------------
+# Load generator
+# -------------------------------------------------------------------
+class Trace:
+    def __init__(self, path: str):
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.queries = []
+        self.tool_replies = defaultdict(lambda: defaultdict(list))
+        self.llm_replies = defaultdict(list)
+        self.model = ""
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # torn final line of a live recording
+                kind = event.get("event")
+                if kind == "tool_info":
+                    self.tools[event["name"]] = event
+                elif kind == "query":
+                    self.queries.append((event["t"], event["text"], event.get("source", "user")))
+                elif kind == "tool":
+                    replies = self.tool_replies[event["tool"]][event["query"].lower()]
+                    replies.append((event["latency"], event["response"]))
+                elif kind == "llm":
+                    self.model = event["model"]
+                    self.llm_replies[event["prompt"]].append((event["latency"], event["response"], event["usage"]))
+
+        self.queries.sort(key=lambda query: query[0])
+        start = self.queries[0][0] if self.queries else 0.0
+        self.queries = [(t - start, text, source) for t, text, source in self.queries]
+        self.span = self.queries[-1][0] if self.queries else 0.0
+
+    def build(self, latency_scale: float = 1.0, **conversation_args):
+        # fresh reply cursors per run, so every replay starts from the same state
+        tools = [FakeTool(info, _Replies(self.tool_replies[name]), latency_scale) for name, info in self.tools.items()]
+        llm = FakeLLM(self.model, _Replies(self.llm_replies), latency_scale)
+        return ConversationManager(tools, llm, **conversation_args), tools, llm
+
+
+def run_load(trace: Trace, speed: float = 1.0, concurrency: int = 4, repeat: int = 1,
+             latency_scale: float = 1.0, trace_memory: bool = False, gap: float = 1.0) -> Dict[str, Any]:
+    # speed scales the gaps between arrivals (0 = send everything at once);
+    # latency_scale scales the recorded provider latencies
+    conversation, tools, llm = trace.build(latency_scale)
+    scheduler = QueryScheduler(max_workers=concurrency)
+    latencies = defaultdict(list)
+    errors = Counter()
+    lock = threading.Lock()
+    finished = threading.Semaphore(0)
+    total = len(trace.queries) * repeat
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    def submit(text: str, source: str, due: float):
+        def work(token):
+            if source == "prefetch":
+                return conversation.prefetch(text, token)
+            return conversation.process_query(text, token)
+
+        def done(result, error):
+            with lock:
+                latencies[source].append((time.perf_counter() - due) * 1000)
+                if error is not None:
+                    errors[type(error).__name__] += 1
+            finished.release()
+
+        scheduler.submit(work, priority=10 if source == "prefetch" else 0, on_done=done)
+
+    for rep in range(repeat):
+        offset = rep * (trace.span + gap)
+        for t, text, source in trace.queries:
+            due = started + ((offset + t) / speed if speed > 0 else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # latency counts from the scheduled arrival, so queueing shows up
+            submit(text, source, max(due, started))
+
+    for _ in range(total):
+        finished.acquire()
+    elapsed = time.perf_counter() - started
+    scheduler.shutdown()
+
+    memory = {}
+    if trace_memory:
+        memory["traced_peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        memory["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return {
+        "requests": total,
+        "elapsed": elapsed,
+        "concurrency": concurrency,
+        "speed": speed,
+        "latency": dict(latencies),
+        "errors": dict(errors),
+        "tool_calls": {tool.name: tool.replies.requests for tool in tools},
+        "llm_calls": llm.replies.requests,
+        "cache_entries": len(conversation.cache),
+        "memory": memory,
+    }
+
+
+def print_report(report: Dict[str, Any], out=sys.stdout):
+    elapsed = report["elapsed"]
+    print(f"{report['requests']} requests in {elapsed:.2f}s at {report['speed']}x, "
+          f"concurrency {report['concurrency']}: {report['requests'] / elapsed:.1f} req/s", file=out)
+
+    print("\nLatency from scheduled arrival (ms)", file=out)
+    for source, values in sorted(report["latency"].items()):
+        print(f"  {source:9s} n={len(values):5d} p50={_percentile(values, 50):8.1f} "
+              f"p95={_percentile(values, 95):8.1f} p99={_percentile(values, 99):8.1f} "
+              f"max={max(values):8.1f}", file=out)
+
+    if report["errors"]:
+        detail = ", ".join(f"{name}={count}" for name, count in sorted(report["errors"].items()))
+        print(f"\nErrors: {detail}", file=out)
+
+    print("\nProvider calls", file=out)
+    for name, calls in sorted(report["tool_calls"].items()):
+        print(f"  {name:20s} {calls:6d}", file=out)
+    print(f"  {'LLM':20s} {report['llm_calls']:6d}", file=out)
+    print(f"  tool cache entries at end: {report['cache_entries']}", file=out)
+
+    memory = report["memory"]
+    if memory:
+        print("\nMemory", file=out)
+        if "max_rss" in memory:
+            print(f"  peak RSS      {memory['max_rss'] / 1024 / 1024:8.1f} MiB", file=out)
+        if "traced_peak" in memory:
+            print(f"  traced peak   {memory['traced_peak'] / 1024 / 1024:8.1f} MiB", file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session against fake providers.")
+    parser.add_argument("trace", help="trace recorded with RECORD_TRACE")
+    parser.add_argument("--speed", type=float, default=1.0, help="arrival speed-up (0 = all at once)")
+    parser.add_argument("--concurrency", type=int, default=4, help="queries processed in parallel")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the trace this many times")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply recorded provider latencies")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python heap peak (slower)")
+    args = parser.parse_args(argv)
+
+    trace = Trace(args.trace)
+    if not trace.queries:
+        parser.error(f"no queries recorded in {args.trace}")
+    print_report(run_load(trace, args.speed, args.concurrency, args.repeat,
+                          args.latency_scale, args.tracemalloc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+# -------------------------------------------------------------------
+# Cancellation
+# -------------------------------------------------------------------
+class QueryCancelled(Exception):
+    pass
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        # sleeps up to `timeout`, returning early (True) once cancelled
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise QueryCancelled()
+
+
+def check(token: Optional[CancellationToken]):
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+# -------------------------------------------------------------------
+# Token-bucket rate limiter
+# -------------------------------------------------------------------
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens < tokens:
+                return False
+
+            self._tokens -= tokens
+            return True
+
+
+# -------------------------------------------------------------------
+# Prioritized worker pool
+# -------------------------------------------------------------------
+# Lower priority values run first. Tasks submitted with a `group` supersede
+# every earlier task of the same group: pending ones are dropped and running
+# ones see their token cancelled at the next checkpoint.
+
+class Task:
+    def __init__(self, fn: Callable[[CancellationToken], Any], priority: int,
+                 group: Optional[str], on_done: Optional[Callable[[Any, Optional[Exception]], None]]):
+        self.fn = fn
+        self.priority = priority
+        self.group = group
+        self.on_done = on_done
+        self.token = CancellationToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        result, error = None, None
+        try:
+            self.token.raise_if_cancelled()
+            result = self.fn(self.token)
+            self.token.raise_if_cancelled()
+        except Exception as e:
+            error = e
+
+        if self.on_done:
+            self.on_done(result, error)
+
+
+class QueryScheduler:
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Task] = {}
+        self._workers: List[threading.Thread] = []
+        self._closed = False
+
+    def submit(self, fn: Callable[[CancellationToken], Any], priority: int = 0,
+               group: Optional[str] = None,
+               on_done: Optional[Callable[[Any, Optional[Exception]], None]] = None) -> Task:
+        task = Task(fn, priority, group, on_done)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Scheduler has been shut down")
+
+            if group is not None:
+                previous = self._groups.get(group)
+                if previous is not None:
+                    previous.cancel()
+                self._groups[group] = task
+
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+        self._queue.put((priority, next(self._seq), task))
+        return task
+
+    def cancel_group(self, group: str):
+        with self._lock:
+            task = self._groups.pop(group, None)
+        if task is not None:
+            task.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for task in self._groups.values():
+                task.cancel()
+            self._groups.clear()
+            workers = list(self._workers)
+
+        for _ in workers:
+            self._queue.put((float("inf"), next(self._seq), None))
+
+    def _work(self):
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                return
+
+            try:
+                task.run()
+            except Exception:
+                # a failing on_done callback must not take the worker down
+                pass
+
+            if task.group is not None:
+                with self._lock:
+                    if self._groups.get(task.group) is task:
+                        del self._groups[task.group]
@@ -1,18 +1,57 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 import requests
 import os
 from duckduckgo_search import DDGS
 import googleapiclient.discovery
+from core.scheduler import CancellationToken, QueryCancelled, check
+from core.payloads import Record, loads
+from core.registry import (
+    ResultSchema, DEFAULT_SCHEMA, COST_FREE, COST_LOW, COST_MEDIUM, COST_HIGH,
+    LATENCY_FAST, LATENCY_SLOW
+)
+
+REQUEST_TIMEOUT = 10
+
+# record layouts; one key tuple is shared by every record a tool returns
+WEB_KEYS = ("title", "link", "snippet")
+OMDB_KEYS = ("title", "year", "rating", "plot", "director", "actors", "genre",
+             "poster", "imdbID", "imdbLink")
+VIDEO_KEYS = ("title", "description", "thumbnail", "link", "videoId")
+
+
+def _google_item(item: Dict[str, Any]) -> tuple:
+    return item.get("title", ""), item.get("link", ""), item.get("snippet", "")
+
+
+def _omdb_detail(detail: Dict[str, Any]) -> tuple:
+    imdb_id = detail.get("imdbID", "")
+    return (
+        detail.get("Title", ""), detail.get("Year", ""), detail.get("imdbRating", "N/A"),
+        detail.get("Plot", ""), detail.get("Director", ""), detail.get("Actors", ""),
+        detail.get("Genre", ""), detail.get("Poster", ""), imdb_id,
+        f"https://www.imdb.com/title/{imdb_id}"
+    )
 
 
 # -------------------------------------------------------------------
 # Base class for tools
 # -------------------------------------------------------------------
 class SearchTool:
+    # declarative metadata read by core.registry (see ToolRegistry)
+    kind = "web"
+    schema = DEFAULT_SCHEMA
+    cost = COST_LOW
+    latency = LATENCY_FAST
+    requests_per_call = 1    # HTTP requests one search() makes, at most
+    query_template = "{title}"
+
     def __init__(self, name: str):
         self.name = name
+
+    def build_query(self, title: str) -> str:
+        return self.query_template.format(title=title)
         
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         raise NotImplementedError("Subclasses must implement search method")
 
 
@@ -20,6 +59,17 @@ class SearchTool:
 # GOOGLE SEARCH (NEW)
 # -------------------------------------------------------------------
 class GoogleSearch(SearchTool):
+    kind = "web"
+    cost = COST_MEDIUM   # 100 free queries/day, paid after that
+    latency = LATENCY_FAST
+    query_template = "{title} imdb rating release date director starring"
+    schema = ResultSchema(
+        fields=("title", "snippet"),
+        heading="🌐 Google Search Results:",
+        details=("{snippet}",),
+        facts=True
+    )
+
     def __init__(self):
         super().__init__("Google Search")
         
@@ -31,7 +81,7 @@ class GoogleSearch(SearchTool):
         
         self.base_url = "https://www.googleapis.com/customsearch/v1"
 
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         try:
             params = {
                 "key": self.api_key,
@@ -40,23 +90,19 @@ class GoogleSearch(SearchTool):
                 "num": 5
             }
 
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-
-            formatted = []
-            for item in data.get("items", []):
-                formatted.append({
-                    "title": item.get("title", ""),
-                    "link": item.get("link", ""),
-                    "snippet": item.get("snippet", "")
-                })
+            check(token)
+            response = requests.get(self.base_url, params=params, timeout=REQUEST_TIMEOUT)
+            data = loads(response.content)
 
             return {
                 "tool": self.name,
                 "query": query,
-                "results": formatted
+                "results": [Record(WEB_KEYS, _google_item(item)) for item in data.get("items", [])],
+                "payload_bytes": len(response.content)
             }
 
+        except QueryCancelled:
+            raise
         except Exception as e:
             return {
                 "tool": self.name,
@@ -70,11 +116,23 @@ class GoogleSearch(SearchTool):
 # DuckDuckGo Search (optional)
 # -------------------------------------------------------------------
 class DuckDuckGoSearch(SearchTool):
+    kind = "web"
+    cost = COST_FREE
+    latency = LATENCY_FAST
+    query_template = "{title} imdb rating release date director starring"
+    schema = ResultSchema(
+        fields=("title", "snippet"),
+        heading="📊 IMDB Information:",
+        details=("{snippet}",),
+        facts=True
+    )
+
     def __init__(self):
         super().__init__("DuckDuckGo Search")
 
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         try:
+            check(token)
             with DDGS() as ddgs:
                 results = ddgs.text(
                     f"{query} imdb rating movie details",
@@ -82,13 +140,14 @@ class DuckDuckGoSearch(SearchTool):
                     max_results=5
                 )
 
-            formatted = []
-            for r in results:
-                formatted.append({
-                    "title": r.get("title", ""),
-                    "link": r.get("href", "") or "https://duckduckgo.com",
-                    "snippet": r.get("body", "")
-                })
+            formatted = [
+                Record(WEB_KEYS, (
+                    r.get("title", ""),
+                    r.get("href", "") or "https://duckduckgo.com",
+                    r.get("body", "")
+                ))
+                for r in results
+            ]
 
             return {
                 "tool": self.name,
@@ -96,6 +155,8 @@ class DuckDuckGoSearch(SearchTool):
                 "results": formatted
             }
 
+        except QueryCancelled:
+            raise
         except Exception as e:
             return {
                 "tool": self.name,
@@ -109,6 +170,26 @@ class DuckDuckGoSearch(SearchTool):
 # OMDB API
 # -------------------------------------------------------------------
 class OMDBSearch(SearchTool):
+    kind = "metadata"
+    cost = COST_LOW      # 1000 free requests/day
+    latency = LATENCY_SLOW   # one search plus a detail request per hit
+    requests_per_call = 4    # the search plus up to three detail requests
+    query_template = "{title}"
+    schema = ResultSchema(
+        fields=("title", "year", "rating", "genre", "director", "actors", "plot", "imdbID"),
+        heading="🎬 Movie Details:",
+        item="{title} ({year})",
+        details=(
+            "Rating: ⭐ {rating}/10",
+            "Genre: {genre}",
+            "Director: {director}",
+            "Cast: {actors}",
+            "Plot: {plot}",
+        ),
+        link="imdbLink",
+        image=("poster", "poster")
+    )
+
     def __init__(self):
         super().__init__("OMDB Search")
         self.api_key = os.getenv("OMDB_API_KEY")
@@ -116,15 +197,17 @@ class OMDBSearch(SearchTool):
             raise ValueError("OMDB API Key must be set")
         self.base_url = "http://www.omdbapi.com/"
         
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         try:
             params = {
                 "apikey": self.api_key,
                 "s": query
             }
             
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            check(token)
+            response = requests.get(self.base_url, params=params, timeout=REQUEST_TIMEOUT)
+            data = loads(response.content)
+            payload_bytes = len(response.content)
             
             formatted_results = []
             
@@ -135,28 +218,23 @@ class OMDBSearch(SearchTool):
                         "apikey": self.api_key,
                         "i": item["imdbID"]
                     }
-                    detail_resp = requests.get(self.base_url, params=detail_params)
-                    detail = detail_resp.json()
+                    check(token)
+                    detail_resp = requests.get(self.base_url, params=detail_params, timeout=REQUEST_TIMEOUT)
+                    detail = loads(detail_resp.content)
+                    payload_bytes += len(detail_resp.content)
 
                     if detail.get("Response") == "True":
-                        formatted_results.append({
-                            "title": detail.get("Title", ""),
-                            "year": detail.get("Year", ""),
-                            "rating": detail.get("imdbRating", "N/A"),
-                            "plot": detail.get("Plot", ""),
-                            "director": detail.get("Director", ""),
-                            "actors": detail.get("Actors", ""),
-                            "genre": detail.get("Genre", ""),
-                            "poster": detail.get("Poster", ""),
-                            "imdbLink": f"https://www.imdb.com/title/{detail.get('imdbID', '')}"
-                        })
+                        formatted_results.append(Record(OMDB_KEYS, _omdb_detail(detail)))
                         
             return {
                 "tool": self.name,
                 "query": query,
-                "results": formatted_results
+                "results": formatted_results,
+                "payload_bytes": payload_bytes
             }
             
+        except QueryCancelled:
+            raise
         except Exception as e:
             return {
                 "tool": self.name,
@@ -170,6 +248,21 @@ class OMDBSearch(SearchTool):
 # YOUTUBE SEARCH (TRAILERS)
 # -------------------------------------------------------------------
 class YouTubeSearch(SearchTool):
+    kind = "video"
+    cost = COST_HIGH     # 100 of 10k daily quota units per search
+    latency = LATENCY_FAST
+    query_template = "{title} trailer"
+    schema = ResultSchema(
+        fields=("title", "link"),
+        heading="🎥 Trailer:",
+        item="🎬 {title}",
+        link="link",
+        image=("thumbnail", "thumbnail"),
+        label="🎬 Trailer Search",
+        numbered=False,
+        max_results=1
+    )
+
     def __init__(self):
         super().__init__("YouTube Search")
         self.api_key = os.getenv("YOUTUBE_API_KEY")
@@ -180,12 +273,13 @@ class YouTubeSearch(SearchTool):
             "youtube", "v3", developerKey=self.api_key
         )
         
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(self, query: str, token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         try:
             search_terms = query.lower()
             if "trailer" not in search_terms:
                 search_terms += " official trailer movie"
             
+            check(token)
             search_response = self.youtube.search().list(
                 q=search_terms,
                 part="snippet",
@@ -197,13 +291,13 @@ class YouTubeSearch(SearchTool):
             
             for item in search_response.get("items", []):
                 vid = item["id"]["videoId"]
-                formatted_results.append({
-                    "title": item["snippet"]["title"],
-                    "description": item["snippet"]["description"],
-                    "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
-                    "link": f"https://www.youtube.com/watch?v={vid}",
-                    "videoId": vid
-                })
+                formatted_results.append(Record(VIDEO_KEYS, (
+                    item["snippet"]["title"],
+                    item["snippet"]["description"],
+                    item["snippet"]["thumbnails"]["default"]["url"],
+                    f"https://www.youtube.com/watch?v={vid}",
+                    vid
+                )))
                 
             return {
                 "tool": self.name,
@@ -211,6 +305,8 @@ class YouTubeSearch(SearchTool):
                 "results": formatted_results
             }
             
+        except QueryCancelled:
+            raise
         except Exception as e:
             return {
                 "tool": self.name,
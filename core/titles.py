@@ -0,0 +1,50 @@
+import re
+
+
+# -------------------------------------------------------------------
+# Local title guessing
+# -------------------------------------------------------------------
+# Strips the conversational wrapper from a query ("Tell me about The
+# Batman", "who directed Inception and when was it released?") so tool
+# lookups are keyed on the title alone. No network access.
+
+_LEADING = re.compile(
+    r"^(?:(?:can you |could you |please )?(?:tell me|show me|give me|find|search)"
+    r"(?: (?:some |more )?(?:info(?:rmation)?|details|everything))?(?: (?:about|on|for))?"
+    r"|what(?:'s| is| was)(?: the)?(?: (?:rating|plot|cast)(?: of| for)?)?"
+    r"|who (?:directed|stars in|starred in|is in|was in)"
+    r"|when (?:was|did|is)"
+    r"|how (?:good|long) is"
+    r"|is"
+    r"|(?:the )?trailer (?:for|of)"
+    r"|info(?:rmation)? (?:about|on))\s+",
+    re.IGNORECASE
+)
+
+_TRAILING = re.compile(
+    r"(?:\s+(?:and|&)\s+(?:when|who|what|how|is|was)\b.*"
+    r"|\s+(?:released|come out|coming out|any good|good|worth watching)\b.*"
+    r"|\s+(?:the\s+)?(?:movie|film|show|series|trailer))+$",
+    re.IGNORECASE
+)
+
+
+def guess_title(query: str) -> str:
+    text = " ".join(query.split()).strip(" ?!.")
+    title = _LEADING.sub("", text, count=1)
+    title = _TRAILING.sub("", title).strip(" ?!.,'\"")
+    return title or text
+
+
+# words that never make a title on their own ("Tell me about", "The")
+_STOP_WORDS = frozenset((
+    "a", "an", "the", "of", "and", "or", "in", "on", "at", "to", "for", "about", "with", "from",
+    "me", "tell", "show", "give", "find", "search", "please", "can", "could", "you", "it",
+    "what", "who", "when", "how", "is", "was", "info", "movie", "film", "trailer",
+))
+
+
+def plausible_title(title: str) -> bool:
+    # enough of a title to be worth a speculative lookup: "The Bat" is not
+    words = [w for w in re.findall(r"\w+", title.lower()) if w not in _STOP_WORDS]
+    return sum(len(w) for w in words) >= 4
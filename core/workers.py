@@ -0,0 +1,140 @@
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.entities import IMDB_ID, EntityIndex, close_enough, journal_article_pattern, journal_pattern, parse_title, pick
+from core.extract import extract_facts
+
+
+# -------------------------------------------------------------------
+# Process-pool mode for CPU-bound post-processing
+# -------------------------------------------------------------------
+# Fact extraction and fuzzy title resolution are pure Python and hold the
+# GIL; in batch or server runs they contend with the I/O threads. A CPUPool
+# runs them in worker processes instead, one round trip per tool response.
+#
+# Only strings cross the process boundary. The entity title index is not
+# pickled per task or copied into each worker: EntityIndex.journal() keeps
+# an append-only file of "title\tyear\timdbID" lines, and every worker
+# maps it (one shared page cache) and searches the bytes in place. A task
+# carries the journal's size when it was submitted; a worker remaps only
+# when its map is shorter than that, and never looks past it.
+#
+# Responses whose results all carry an imdbID or an IMDB link and that have
+# no snippets (OMDB, YouTube with IMDB links) need neither step and skip
+# the pool entirely.
+
+# "\ntitle\tyear\timdbID"; the journal starts with "\n"
+_LINE = re.compile(rb"\n([^\t\n]*)\t([^\t\n]*)\t([^\n]*)")
+
+# worker-local: journal path -> read-only map of it
+_maps: Dict[str, mmap.mmap] = {}
+
+
+def _journal(path: str, size: int) -> mmap.mmap:
+    mapped = _maps.get(path)
+    if mapped is None or len(mapped) < size:
+        if mapped is not None:
+            mapped.close()
+        with open(path, "rb") as f:
+            mapped = _maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped
+
+
+def _match(mapped: mmap.mmap, size: int, text: str) -> Optional[str]:
+    # EntityIndex.resolve() against the journal: exact title, then close ones
+    title, year = parse_title(text)
+    if not title:
+        return None
+
+    needle = b"\n" + title.encode("utf-8") + b"\t"
+    candidates = []
+    pos = mapped.find(needle, 0, size)
+    while pos != -1:
+        line = _LINE.match(mapped, pos, size)
+        candidates.append((line.group(3).decode(), line.group(2).decode()))
+        pos = mapped.find(needle, line.end(), size)
+    if not candidates:
+        # the regex skips most lines without decoding them
+        for line in journal_pattern(title).finditer(mapped, 0, size):
+            if close_enough(title, line.group(1).decode("utf-8")):
+                candidates.append((line.group(3).decode(), line.group(2).decode()))
+    found = pick(candidates, year)
+
+    if found is None and year is not None:
+        candidates = [(line.group(3).decode(), line.group(2).decode())
+                      for line in journal_article_pattern(title).finditer(mapped, 0, size)]
+        found = pick(candidates, year)
+    return found
+
+
+def post_process(index: Optional[Tuple[str, int]], snippets: Sequence[str],
+                 titles: Sequence[str]) -> Tuple[Dict[str, str], List[Optional[str]]]:
+    # runs in a worker: (facts for the snippets, imdbID match per title);
+    # index is EntityIndex.journal()'s (path, size), None when still empty
+    facts = extract_facts(snippets) if any(snippets) else {}
+    if index is None or not titles:
+        return facts, [None] * len(titles)
+    path, size = index
+    mapped = _journal(path, size)
+    return facts, [_match(mapped, size, title) for title in titles]
+
+
+def _post_process_job(job: Tuple[Optional[Tuple[str, int]], Sequence[str], Sequence[str]]):
+    return post_process(*job)
+
+
+class CPUPool:
+    def __init__(self, max_workers: Optional[int] = None, index_dir: Optional[str] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._owns_dir = index_dir is None
+        self.index_dir = index_dir or tempfile.mkdtemp(prefix="mra-index-")
+        # forkserver: never fork a process that is running Tk or I/O threads
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context(method))
+
+    def index(self, index: EntityIndex) -> Optional[Tuple[str, int]]:
+        if not index.entities:
+            return None
+        return index.journal(os.path.join(self.index_dir, "titles.idx"))
+
+    @staticmethod
+    def job(results: Dict[str, Any]) -> Tuple[List[str], List[str], List[int]]:
+        # snippets, plus the titles (and their positions) that need matching;
+        # EntityIndex.ingest() resolves the rest from an imdbID or IMDB link
+        rows = results.get("results", [])
+        snippets = [r.get("snippet", "") for r in rows]
+        positions = [i for i, r in enumerate(rows)
+                     if not r.get("imdbID") and not IMDB_ID.search(r.get("link", ""))]
+        return snippets, [rows[i].get("title", "") for i in positions], positions
+
+    def annotate(self, index: EntityIndex, results: Dict[str, Any]) -> Optional[List[Optional[str]]]:
+        # the process-pool counterpart of annotate_results(); returns the
+        # title matches to hand to EntityIndex.ingest(..., matched)
+        snippets, titles, positions = self.job(results)
+        if not titles and not any(snippets):
+            return None  # nothing CPU-bound to do; not worth a round trip
+
+        facts, found = self._executor.submit(post_process, self.index(index), snippets, titles).result()
+        if facts:
+            results["facts"] = facts
+        matched = [None] * len(results.get("results", []))
+        for i, imdb_id in zip(positions, found):
+            matched[i] = imdb_id
+        return matched
+
+    def map(self, index: EntityIndex, jobs: Iterable[Tuple[Sequence[str], Sequence[str]]],
+            chunksize: int = 16) -> Iterable[Tuple[Dict[str, str], List[Optional[str]]]]:
+        # batch mode: (snippets, titles) pairs, results in order
+        journal = self.index(index)
+        return self._executor.map(_post_process_job, ((journal, s, t) for s, t in jobs), chunksize=chunksize)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._owns_dir:
+            shutil.rmtree(self.index_dir, ignore_errors=True)
@@ -0,0 +1,38 @@
+import os
+
+from core.analytics import AnalyticsLog, read_blocks
+
+
+def write(path, events):
+    log = AnalyticsLog(path, flush_rows=1000)
+    for event in events:
+        log.record(*event)
+    log.flush()
+
+
+def test_blocks_round_trip(tmp_path):
+    path = str(tmp_path / "events.mra")
+    write(path, [("query", "", "the batman", "user", "", 12.5, 0, 100, 20),
+                 ("tool", "OMDB Search", "the batman", "prefetch", "miss", 300.0, 4096)])
+    write(path, [("llm", "model", "dune", "user", "hit", 1.0, 0, 50, 10)])
+
+    blocks = list(read_blocks(path))
+    assert [len(block["ts"]) for block in blocks] == [2, 1]
+    assert blocks[0]["kind"] == ["query", "tool"]
+    assert blocks[0]["title"] == ["the batman", "the batman"]
+    assert blocks[0]["latency_ms"] == [12.5, 300.0]
+    assert blocks[0]["payload_bytes"] == [0, 4096]
+    assert blocks[1]["cache"] == ["hit"] and blocks[1]["tokens_out"] == [10]
+
+
+def test_torn_block_followed_by_later_runs(tmp_path):
+    path = str(tmp_path / "events.mra")
+    write(path, [("query", "", "alien")])
+    write(path, [("query", "", "dune")])
+    # crash halfway through the second block, then a later run appends
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+    write(path, [("query", "", "inception")])
+
+    titles = [title for block in read_blocks(path) for title in block["title"]]
+    assert titles == ["alien", "inception"]
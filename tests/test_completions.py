@@ -0,0 +1,21 @@
+import os
+
+from core import completions
+from core.completions import CompletionCache, summarize
+
+
+def test_hit_log_is_rolled_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(completions, "HITS_LOG_MAX_BYTES", 200)
+    root = str(tmp_path)
+    cache = CompletionCache(root)
+    cache.set("ab" * 32, "answer", (100, 20), 0.5, "llama-3.1-8b-instant")
+    for _ in range(50):
+        assert cache.get("ab" * 32)["response"] == "answer"
+
+    log = os.path.join(root, "hits.log")
+    assert not os.path.exists(log) or os.path.getsize(log) <= 200 + 64
+    assert os.path.exists(os.path.join(root, "hits.json"))
+    summary = summarize(root)
+    assert summary["hits"] == 50
+    assert summary["tokens_in"] == 5000 and summary["tokens_out"] == 1000
+    assert abs(summary["seconds"] - 25.0) < 1e-6
@@ -0,0 +1,38 @@
+from core.context import ContextBuilder
+
+
+def omdb(i):
+    return {"results": [{"title": f"Film {i}", "year": "2020", "imdbLink": f"https://www.imdb.com/title/tt{i:07d}"}]}
+
+
+def test_old_films_are_folded_and_context_stays_bounded():
+    context = ContextBuilder(max_films=4, describe=lambda film: f"{film} digest")
+    sizes = []
+    for i in range(100):
+        context.add("OMDB Search", f"Film {i}", omdb(i), film=f"tt{i:07d}")
+        sizes.append(len(context.render()))
+    assert len(context.films) <= 4
+    assert context.summary_chars <= context.max_summary_chars
+    assert max(sizes[50:]) == max(sizes[90:])
+    assert context.render().startswith("Films discussed earlier:\n")
+    assert "- tt0000099 digest" not in context.render()
+    assert "- tt0000095 digest" in context.render()
+
+
+def test_prefix_is_stable_between_folds():
+    context = ContextBuilder(max_films=4)
+    context.add("OMDB Search", "Film 1", omdb(1), film="a")
+    context.add("OMDB Search", "Film 2", omdb(2), film="b")
+    before = context.render()
+    context.add("OMDB Search", "Film 1 again", omdb(3), film="a")
+    assert context.render().startswith(before)
+    assert context.render().endswith("Film 3|")
+
+
+def test_folded_film_gets_its_tables_back():
+    context = ContextBuilder(max_films=2)
+    for film in ("a", "b", "c"):
+        context.add("OMDB Search", film, omdb(ord(film)), film=film)
+    assert "a" not in context.films
+    context.add("OMDB Search", "a", omdb(ord("a")), film="a")
+    assert context.films["a"]
@@ -0,0 +1,59 @@
+from core.entities import EntityIndex, normalize_title
+
+
+def make_index():
+    index = EntityIndex()
+    index.add("tt0078748", "Alien", "1979")
+    index.add("tt0114709", "Toy Story", "1995")
+    index.add("tt1877830", "The Batman", "2022")
+    index.add("tt0096895", "Batman", "1989")
+    return index
+
+
+def test_sequels_and_plurals_are_different_films():
+    index = make_index()
+    assert index.resolve("Aliens") is None
+    assert index.resolve("Toy Story 3") is None
+    assert index.resolve("Alien").imdb_id == "tt0078748"
+    assert index.resolve("Toy Story").imdb_id == "tt0114709"
+
+
+def test_article_is_part_of_the_title():
+    index = make_index()
+    assert normalize_title("The Batman") != normalize_title("Batman")
+    assert index.resolve("Batman").imdb_id == "tt0096895"
+    assert index.resolve("The Batman").imdb_id == "tt1877830"
+    assert index.resolve("THE BATMAN – Main Trailer").imdb_id == "tt1877830"
+
+
+def test_year_can_stand_in_for_the_article():
+    index = make_index()
+    assert index.resolve("Batman (2022)").imdb_id == "tt1877830"
+    assert index.resolve("Batman 2022").imdb_id == "tt1877830"
+    assert index.resolve("The Batman (1989)").imdb_id == "tt0096895"
+    assert index.resolve("Batman").imdb_id == "tt0096895"
+    assert index.resolve("Batman (2005)") is None
+
+
+def test_typos_still_match():
+    index = make_index()
+    index.add("tt1375666", "Inception", "2010")
+    assert index.resolve("Inceptoin").imdb_id == "tt1375666"
+
+
+def test_ambiguous_title_without_year_is_no_match():
+    index = EntityIndex()
+    index.add("tt0110357", "The Lion King", "1994")
+    index.add("tt6105098", "The Lion King", "2019")
+    assert index.resolve("The Lion King") is None
+    assert index.resolve("The Lion King (2019)").imdb_id == "tt6105098"
+
+
+def test_ingest_merges_a_digest_per_film():
+    index = EntityIndex()
+    index.ingest({"results": [{"title": "The Batman", "year": "2022", "imdbID": "tt1877830",
+                               "rating": "7.8", "genre": "Action, Crime", "plot": "Not kept"}]})
+    index.ingest({"results": [{"title": "The Batman (2022) - IMDb", "link": "https://www.imdb.com/title/tt1877830/"}],
+                  "facts": {"rating": "7.9/10", "runtime": "2h 56m"}})
+    entity = index.get("tt1877830")
+    assert entity.digest() == "The Batman (2022): rating=7.8; genre=Action, Crime; runtime=2h 56m"
@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+from core.registry import COST_LOW, COST_MEDIUM, LATENCY_FAST, LATENCY_SLOW, ToolRegistry
+
+
+def tool(name, kind, cost, latency):
+    return SimpleNamespace(name=name, kind=kind, cost=cost, latency=latency)
+
+
+def test_cheapest_then_fastest_tool_per_kind():
+    registry = ToolRegistry([
+        tool("slow web", "web", COST_LOW, LATENCY_SLOW),
+        tool("fast web", "web", COST_LOW, LATENCY_FAST),
+        tool("paid web", "web", COST_MEDIUM, LATENCY_FAST),
+        tool("metadata", "metadata", COST_LOW, LATENCY_SLOW),
+    ])
+    assert [t.name for t in registry.select()] == ["metadata", "fast web"]
+    assert registry.pick("web", max_cost=COST_LOW - 1) is None
@@ -0,0 +1,8 @@
+from core.scheduler import RateLimiter
+
+
+def test_multi_token_acquire():
+    limiter = RateLimiter(rate=0.0, burst=4)
+    assert not limiter.try_acquire(5)
+    assert limiter.try_acquire(4)
+    assert not limiter.try_acquire()
@@ -0,0 +1,11 @@
+from core.titles import guess_title, plausible_title
+
+
+def test_partial_queries_are_not_plausible_titles():
+    for text in ("Tell me about", "The", "The Bat", "what is the"):
+        assert not plausible_title(guess_title(text)), text
+
+
+def test_titles_are_plausible():
+    for text in ("Tell me about The Batman", "Dune", "who directed Alien", "1917"):
+        assert plausible_title(guess_title(text)), text
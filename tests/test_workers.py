@@ -0,0 +1,35 @@
+from core.workers import CPUPool, post_process
+from tests.test_entities import make_index
+
+
+def test_journal_matches_like_the_index(tmp_path):
+    index = make_index()
+    journal = index.journal(str(tmp_path / "titles.idx"))
+    titles = ["Aliens", "Toy Story 3", "Alien", "THE BATMAN – Main Trailer", "Batman (1989)", "Top 10 movies",
+              "Batman (2022)"]
+    _, matched = post_process(journal, [], titles)
+    assert matched == [e.imdb_id if e else None for e in map(index.resolve, titles)]
+    assert matched == [None, None, "tt0078748", "tt1877830", "tt0096895", None, "tt1877830"]
+
+
+def test_journal_grows_with_the_index(tmp_path):
+    index = make_index()
+    index.journal(str(tmp_path / "titles.idx"))
+    assert post_process(index.journal(str(tmp_path / "titles.idx")), [], ["Inceptoin"])[1] == [None]
+    index.add("tt1375666", "Inception", "2010")
+    index.add("tt0110357", "The Lion King", "1994")
+    index.add("tt6105098", "The Lion King", "2019")
+    journal = index.journal(str(tmp_path / "titles.idx"))
+    _, matched = post_process(journal, [], ["Inceptoin", "The Lion King", "The Lion King (2019)"])
+    assert matched == ["tt1375666", None, "tt6105098"]
+
+
+def test_only_unresolved_titles_are_sent_to_the_pool():
+    results = {"results": [
+        {"title": "The Batman", "imdbID": "tt1877830"},
+        {"title": "The Batman (2022) - IMDb", "link": "https://www.imdb.com/title/tt1877830/", "snippet": "7.8/10"},
+        {"title": "THE BATMAN – Main Trailer", "link": "https://www.youtube.com/watch?v=mqqft2x_Aa4"},
+    ]}
+    snippets, titles, positions = CPUPool.job(results)
+    assert titles == ["THE BATMAN – Main Trailer"] and positions == [2]
+    assert CPUPool.job({"results": results["results"][:1]})[1:] == ([], [])
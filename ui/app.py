@@ -1,11 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 import os
 
 from core.llm import LLMClient
+from core.completions import CompletionCache
 from core.search import GoogleSearch, OMDBSearch, YouTubeSearch
 from core.conversation import ConversationManager
+from core.scheduler import QueryScheduler, QueryCancelled
+from core.refresher import CatalogueRefresher, load_catalogue
+from core.analytics import AnalyticsLog
+from core.images import ImageStore
+from core.workers import CPUPool
+from core.replay import Recorder
 from ui.components import ConversationDisplay, QueryInput
 from ui.styles import ThemeManager
 
@@ -25,12 +31,38 @@ class RAGApp:
         
         self.root.configure(background=ThemeManager.COLORS["background"])
         
+        self.scheduler = QueryScheduler(max_workers=2)
+        self.refresher = None
+        self.cpu_pool = None
+        self.recorder = None
+        self.image_store = ImageStore(
+            os.getenv("IMAGE_CACHE_DIR")
+            or os.path.join(os.path.expanduser("~"), ".cache", "movie-research-assistant", "images")
+        )
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         self.setup_tools()
         self.setup_ui()
+
+    def on_close(self):
+        if self.refresher:
+            self.refresher.stop()
+        self.scheduler.shutdown()
+        self.image_store.shutdown()
+        if self.cpu_pool:
+            self.cpu_pool.shutdown()
+        if self.recorder:
+            self.recorder.close()
+        self.root.destroy()
     
     def setup_tools(self):
         try:
-            self.llm = LLMClient()
+            # optional: reuse completions for identical prompts across runs
+            cache_dir = os.getenv("LLM_CACHE_DIR")
+            completions = CompletionCache(
+                cache_dir, int(os.getenv("LLM_CACHE_MAX_MB") or 256) * 1024 * 1024
+            ) if cache_dir else None
+            self.llm = LLMClient(completions, cache_bypass=os.getenv("LLM_CACHE_BYPASS", "") in ("1", "true", "yes"))
             
             # Initialize search tools
             tools = []
@@ -59,7 +91,23 @@ class RAGApp:
             except ValueError as e:
                 self.show_warning(f"YouTube API: {str(e)}")
             
-            self.conversation = ConversationManager(tools, self.llm)
+            # optional: record every tool/LLM exchange for `python -m core.replay`
+            trace_path = os.getenv("RECORD_TRACE")
+            if trace_path:
+                self.recorder = Recorder(trace_path)
+                tools = [self.recorder.tool(tool) for tool in tools]
+                self.llm = self.recorder.llm(self.llm)
+
+            # optional: append query/tool analytics for `python -m core.analytics`
+            analytics_path = os.getenv("ANALYTICS_LOG")
+            analytics = AnalyticsLog(analytics_path) if analytics_path else None
+
+            # optional: run fact extraction / title matching in worker processes
+            cpu_workers = int(os.getenv("CPU_WORKERS") or 0)
+            self.cpu_pool = CPUPool(cpu_workers) if cpu_workers > 0 else None
+
+            self.conversation = ConversationManager(tools, self.llm, analytics, self.cpu_pool)
+            self.start_refresher()
             
             active_tools = ", ".join([tool.name for tool in tools])
             self.status_message = f"Ready to assist you | Active tools: {active_tools}"
@@ -69,6 +117,21 @@ class RAGApp:
             self.status_message = "⚠️ Error: API key missing"
             self.conversation = None
     
+    def start_refresher(self):
+        # optional: keep a known catalogue of titles warm in the tool cache
+        catalogue = os.getenv("CATALOGUE_FILE")
+        if not catalogue:
+            return
+
+        try:
+            titles = load_catalogue(catalogue)
+        except OSError as e:
+            self.show_warning(f"Catalogue: {str(e)}")
+            return
+
+        self.refresher = CatalogueRefresher(self.conversation, titles)
+        self.refresher.start()
+
     def show_warning(self, message):
         messagebox.showwarning("API Key Warning", 
                               f"{message}\nSome features will be disabled.")
@@ -77,13 +140,18 @@ class RAGApp:
         main_frame = ttk.Frame(self.root, padding=15)
         main_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.conversation_display = ConversationDisplay(main_frame)
+        self.conversation_display = ConversationDisplay(
+            main_frame,
+            registry=self.conversation.registry if self.conversation else None,
+            image_store=self.image_store
+        )
         self.conversation_display.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
         
         self.query_input = QueryInput(
             main_frame, 
             submit_callback=self.handle_query,
-            model_change_callback=self.update_model
+            model_change_callback=self.update_model,
+            prefetch_callback=self.prefetch
         )
         self.query_input.pack(fill=tk.X)
         
@@ -101,30 +169,45 @@ class RAGApp:
             self.llm.set_model(model_name)
             self.status_var.set(f"Model changed to: {model_name}")
     
+    def prefetch(self, text):
+        if not self.conversation:
+            return
+
+        if self.recorder:
+            self.recorder.query(text, "prefetch")
+
+        # low priority; each new prefetch supersedes the previous one
+        self.scheduler.submit(
+            lambda token: self.conversation.prefetch(text, token),
+            priority=10,
+            group="prefetch"
+        )
+
     def handle_query(self, query):
         if not self.conversation:
             messagebox.showerror("Configuration Error", "Conversation manager not initialized. Please check your API keys.")
             return
         
-        self.status_var.set("🔄 Processing your query...")
-        self.query_input.set_state(tk.DISABLED)
-        
-        threading.Thread(target=self._process_query_thread, args=(query,), daemon=True).start()
-    
-    def _process_query_thread(self, query):
-        try:
-            response, _ = self.conversation.process_query(query)
-            self.root.after(0, self._update_ui_after_query)
-        except Exception as e:
-            error_msg = f"Error processing query: {str(e)}"
-            self.root.after(0, lambda: messagebox.showerror("Processing Error", error_msg))
-            self.root.after(0, self._update_ui_after_query)
+        self.status_var.set(f"🔄 Processing: {query}")
+        if self.recorder:
+            self.recorder.query(query)
+
+        # a newer query supersedes (cancels) whatever is still pending or running
+        self.scheduler.submit(
+            lambda token: self.conversation.process_query(query, token),
+            priority=0,
+            group="query",
+            on_done=lambda result, error: self.root.after(0, self._update_ui_after_query, error)
+        )
     
-    def _update_ui_after_query(self):
+    def _update_ui_after_query(self, error=None):
+        if isinstance(error, QueryCancelled):
+            return
+
+        if error is not None:
+            messagebox.showerror("Processing Error", f"Error processing query: {str(error)}")
+
         if self.conversation:
             self.conversation_display.update_history(self.conversation.history)
         
-        self.query_input.set_state(tk.NORMAL)
-        self.query_input.query_entry.focus_set()
-        
         self.status_var.set("✓ Ready to assist you")
@@ -1,12 +1,23 @@
 import tkinter as tk
 from tkinter import scrolledtext, ttk
 import webbrowser
-import re
+from core.registry import ToolRegistry
 from ui.styles import apply_text_styles, ThemeManager
 
 
 class ConversationDisplay(ttk.LabelFrame):
-    def __init__(self, parent, **kwargs):
+    # Only a window of history entries is materialized in the text widget.
+    # Older entries are rendered on demand when the view is scrolled to the
+    # top, and the far end of the window is dropped again, so widget size,
+    # tag count and redraw cost stay flat however long the session runs.
+    INITIAL_ENTRIES = 40
+    PAGE_ENTRIES = 20
+    MAX_ENTRIES = 80
+
+    POSTER_SIZE = (92, 136)
+    THUMBNAIL_SIZE = (120, 90)
+
+    def __init__(self, parent, registry=None, image_store=None, **kwargs):
         super().__init__(parent, text="Conversation History", padding=10, **kwargs)
 
         container = ttk.Frame(self, padding=5)
@@ -29,180 +40,255 @@ class ConversationDisplay(ttk.LabelFrame):
             height=20
         )
         self.history_text.pack(fill=tk.BOTH, expand=True)
+        self.history_text.configure(yscrollcommand=self._on_scroll)
 
         apply_text_styles(self.history_text)
 
         self.history_text.config(state=tk.DISABLED)
 
+        self._history = []
+        self._first = 0          # index of the first materialized entry
+        self._last = 0           # one past the last materialized entry
+        self._known = 0          # history length at the last update
+        self._entry_tags = {}    # entry index -> per-link tags to free on eviction
+        self._entry_images = {}  # entry index -> {image mark: PhotoImage or None}
+        self.registry = registry if registry is not None else ToolRegistry()
+        self.image_store = image_store if image_store is not None and image_store.available else None
+        self._at = tk.END        # where _write() inserts
+        self._rendering = 0      # entry currently being rendered
+        self._paging = False
+
     # --------------------------------------------------------
     # UPDATE HISTORY
     # --------------------------------------------------------
     def update_history(self, conversation_history):
-        self.history_text.config(state=tk.NORMAL)
-        self.history_text.delete(1.0, tk.END)
+        previous = self._history
+        self._history = conversation_history
+        total = len(conversation_history)
 
-        for entry in conversation_history:
-            if entry["role"] == "user":
-                self.history_text.insert(tk.END, "You: ", "user")
-                self.history_text.insert(tk.END, f"{entry['content']}\n\n", "user")
-
-            elif entry["role"] == "assistant":
-                self.history_text.insert(tk.END, "Assistant: ", "assistant")
-                self.history_text.insert(tk.END, f"{entry['content']}\n\n", "assistant")
-
-            elif entry["role"] == "tool":
-                self.history_text.insert(tk.END, "─" * 80 + "\n", "tool_header")
-                tool_name = entry["tool"]
-
-                # Display tool name with emoji
-                if tool_name == "YouTube Search":
-                    self.history_text.insert(tk.END, f"🎬 Trailer Search: '{entry['query']}'\n", "tool_header")
-                else:
-                    self.history_text.insert(tk.END, f"{tool_name}: '{entry['query']}'\n", "tool_header")
-
-                # Show results based on tool type
-                results = entry["results"].get("results", [])
-                if results:
-                    if tool_name == "DuckDuckGo Search":
-                        self._insert_duckduckgo_results(results)
-                    elif tool_name == "OMDB Search":
-                        self._insert_omdb_results(results)
-                    elif tool_name == "YouTube Search":
-                        self._insert_youtube_results(results)
-                    elif tool_name == "Google Search":
-                        self._insert_google_results(results)     # <── NEW LINE (required)
-                else:
-                    error = entry["results"].get("error", "No results found")
-                    self.history_text.insert(tk.END, f"⚠️ No results: {error}\n", "tool_error")
-
-                self.history_text.insert(tk.END, "─" * 80 + "\n\n", "tool_header")
+        self.history_text.config(state=tk.NORMAL)
 
+        if previous is conversation_history and self._last == self._known and total >= self._last:
+            # showing the tail already: only render what is new
+            self._render_range(self._last, total)
+            self._last = total
+            self._trim_top()
+        else:
+            self._clear()
+            self._first = self._last = max(0, total - self.INITIAL_ENTRIES)
+            self._render_range(self._first, total)
+            self._last = total
+
+        self._known = total
         self.history_text.config(state=tk.DISABLED)
         self.history_text.see(tk.END)
 
     # --------------------------------------------------------
-    # GOOGLE SEARCH (NEW)
+    # WINDOWING
     # --------------------------------------------------------
-    def _insert_google_results(self, results):
-        self.history_text.insert(tk.END, "🌐 Google Search Results:\n", "tool_section")
+    def _on_scroll(self, first, last):
+        self.history_text.vbar.set(first, last)
+
+        if self._paging:
+            return
+        if float(first) <= 0.0 and self._first > 0:
+            self._paging = True
+            self.after_idle(self._load_older)
+        elif float(last) >= 1.0 and self._last < len(self._history):
+            self._paging = True
+            self.after_idle(self._load_newer)
+
+    def _load_older(self):
+        anchor = f"entry_{self._first}"
+        start = max(0, self._first - self.PAGE_ENTRIES)
 
-        for i, r in enumerate(results, 1):
-            title = r.get("title", "")
-            snippet = r.get("snippet", "")
-            link = r.get("link", "")
+        self.history_text.config(state=tk.NORMAL)
+        self.history_text.mark_set("render_at", "1.0")
+        self.history_text.mark_gravity("render_at", tk.RIGHT)
+        self._at = "render_at"
+        try:
+            self._render_range(start, self._first)
+        finally:
+            self._at = tk.END
+            self.history_text.mark_unset("render_at")
+        self._first = start
+        self._trim_bottom()
+        self.history_text.config(state=tk.DISABLED)
+
+        self.history_text.yview(anchor)
+        self._paging = False
 
-            self.history_text.insert(tk.END, f"{i}. {title}\n", "tool_item")
-            self.history_text.insert(tk.END, f"{snippet}\n", "tool_detail")
-            self.history_text.insert(tk.END, "Source: ", "tool_link_label")
+    def _load_newer(self):
+        end = min(len(self._history), self._last + self.PAGE_ENTRIES)
 
-            # clickable link
-            start = self.history_text.index(tk.INSERT)
-            self.history_text.insert(tk.END, f"{link}\n\n", "tool_link")
-            end = self.history_text.index(tk.INSERT)
+        self.history_text.config(state=tk.NORMAL)
+        self._render_range(self._last, end)
+        self._last = end
+        self._trim_top()
+        self.history_text.config(state=tk.DISABLED)
+
+        self._paging = False
+
+    def _render_range(self, start, end):
+        for i in range(start, end):
+            self._rendering = i
+            start = self.history_text.index("end-1c" if self._at == tk.END else self._at)
+            self._render_entry(self._history[i])
+
+            # right gravity: text later prepended at this spot pushes the mark along
+            mark = f"entry_{i}"
+            self.history_text.mark_set(mark, start)
+            self.history_text.mark_gravity(mark, tk.RIGHT)
+
+    def _trim_top(self):
+        if self._last - self._first <= self.MAX_ENTRIES:
+            return
+        keep = self._last - self.MAX_ENTRIES
+        self.history_text.delete("1.0", f"entry_{keep}")
+        self._forget(self._first, keep)
+        self._first = keep
+
+    def _trim_bottom(self):
+        if self._last - self._first <= self.MAX_ENTRIES:
+            return
+        keep = self._first + self.MAX_ENTRIES
+        self.history_text.delete(f"entry_{keep}", tk.END)
+        self._forget(keep, self._last)
+        self._last = keep
+
+    def _forget(self, start, end):
+        for i in range(start, end):
+            self.history_text.mark_unset(f"entry_{i}")
+            for tag in self._entry_tags.pop(i, []):
+                self.history_text.tag_delete(tag)
+            for mark in self._entry_images.pop(i, {}):
+                self.history_text.mark_unset(mark)
+
+    def _clear(self):
+        self.history_text.delete(1.0, tk.END)
+        self._forget(self._first, self._last)
+        self._entry_tags.clear()
+        self._entry_images.clear()
 
-            tag = f"google_{i}_{hash(link)}"
-            self.history_text.tag_add(tag, start, end)
-            self.history_text.tag_config(tag, foreground=ThemeManager.COLORS["link"], underline=1)
-            self.history_text.tag_bind(tag, "<Button-1>", lambda e, url=link: webbrowser.open(url))
+    def _write(self, text, tags=None):
+        self.history_text.insert(self._at, text, tags)
 
     # --------------------------------------------------------
-    # DUCKDUCKGO RESULTS
+    # ENTRY RENDERING
     # --------------------------------------------------------
-    def _insert_duckduckgo_results(self, results):
-        self.history_text.insert(tk.END, "📊 IMDB Information:\n", "tool_section")
+    def _render_entry(self, entry):
+        if entry["role"] == "user":
+            self._write("You: ", "user")
+            self._write(f"{entry['content']}\n\n", "user")
 
-        movie_info = {}
-        for result in results:
-            title = result.get("title", "")
-            snippet = result.get("snippet", "")
+        elif entry["role"] == "assistant":
+            self._write("Assistant: ", "assistant")
+            self._write(f"{entry['content']}\n\n", "assistant")
 
-            if "rating" in snippet.lower() and "rating" not in movie_info:
-                m = re.search(r"(\d+(\.\d+)?)/10", snippet)
-                if m:
-                    movie_info["rating"] = m.group(0)
+        elif entry["role"] == "tool":
+            self._write("─" * 80 + "\n", "tool_header")
+            schema = self.registry.schema(entry["tool"])
+            self._write(f"{schema.label or entry['tool']}: '{entry['query']}'\n", "tool_header")
 
-            if "release" in snippet.lower() and "release_date" not in movie_info:
-                d = re.search(r"released on ([A-Za-z]+ \d+, \d{4})", snippet)
-                if d:
-                    movie_info["release_date"] = d.group(0)
+            results = entry["results"].get("results", [])
+            if results:
+                self._insert_results(schema, results, entry["results"].get("facts"))
+            else:
+                error = entry["results"].get("error", "No results found")
+                self._write(f"⚠️ No results: {error}\n", "tool_error")
 
-        if movie_info:
-            main_title = results[0].get("title", "Movie")
-            self.history_text.insert(tk.END, f"🎬 {main_title}\n", "movie_title")
+            self._write("─" * 80 + "\n\n", "tool_header")
 
-            if "rating" in movie_info:
-                self.history_text.insert(tk.END, f"Rating: ⭐ {movie_info['rating']}\n", "info_value_bold")
+    # --------------------------------------------------------
+    # TOOL RESULTS (layout declared by the tool's ResultSchema)
+    # --------------------------------------------------------
+    def _insert_results(self, schema, results, facts=None):
+        self._write(f"{schema.heading}\n", "tool_section")
+        if schema.facts:
+            self._insert_facts(results[0].get("title", "Movie"), facts)
 
-            if "release_date" in movie_info:
-                self.history_text.insert(tk.END, f"Released: {movie_info['release_date']}\n", "info_value")
+        for i, r in enumerate(results, 1):
+            item = schema.format(schema.item, r)
+            self._write(f"{i}. {item}\n" if schema.numbered else f"{item}\n", "tool_item")
 
-            self.history_text.insert(tk.END, "\n", "tool_detail")
+            if schema.image:
+                field, kind = schema.image
+                self._insert_image(r.get(field), self.POSTER_SIZE if kind == "poster" else self.THUMBNAIL_SIZE)
 
-        # Normal results
-        self.history_text.insert(tk.END, "🔍 Search Results:\n", "results_header")
+            for template in schema.details:
+                self._write(schema.format(template, r) + "\n", "tool_detail")
 
-        for i, r in enumerate(results, 1):
-            title = r.get("title", "")
-            snippet = r.get("snippet", "")
-            link = r.get("link", "")
+            if schema.link and r.get(schema.link):
+                self._insert_clickable_link(r[schema.link])
 
-            self.history_text.insert(tk.END, f"{i}. {title}\n", "tool_item")
-            self.history_text.insert(tk.END, f"{snippet}\n", "tool_detail")
-            self._insert_clickable_link(link, prefix=i)
+            self._write("\n")
 
     # --------------------------------------------------------
-    # OMDB RESULTS
+    # FACTS (extracted once by core.extract when the result arrived)
     # --------------------------------------------------------
-    def _insert_omdb_results(self, results):
-        self.history_text.insert(tk.END, "🎬 Movie Details:\n", "tool_section")
-
-        for i, r in enumerate(results, 1):
-            title = r.get("title")
-            year = r.get("year")
-            rating = r.get("rating")
-            genre = r.get("genre")
-            director = r.get("director")
-            actors = r.get("actors")
-            plot = r.get("plot")
-            imdb = r.get("imdbLink")
-
-            self.history_text.insert(tk.END, f"{i}. {title} ({year})\n", "tool_item")
-            self.history_text.insert(tk.END, f"Rating: ⭐ {rating}/10\n", "tool_detail")
-            self.history_text.insert(tk.END, f"Genre: {genre}\n", "tool_detail")
-            self.history_text.insert(tk.END, f"Director: {director}\n", "tool_detail")
-            self.history_text.insert(tk.END, f"Cast: {actors}\n", "tool_detail")
-            self.history_text.insert(tk.END, f"Plot: {plot}\n", "tool_detail")
-
-            self._insert_clickable_link(imdb)
-
-            self.history_text.insert(tk.END, "\n")
+    FACT_LABELS = (
+        ("rating", "Rating: ⭐ {}", "info_value_bold"),
+        ("release_date", "Released: {}", "info_value"),
+        ("runtime", "Runtime: {}", "info_value"),
+        ("box_office", "Box office: {}", "info_value"),
+        ("director", "Director: {}", "info_value"),
+        ("cast", "Cast: {}", "info_value"),
+    )
+
+    def _insert_facts(self, main_title, facts):
+        if not facts:
+            return
+
+        self._write(f"🎬 {main_title}\n", "movie_title")
+        for key, label, tag in self.FACT_LABELS:
+            if key in facts:
+                self._write(label.format(facts[key]) + "\n", tag)
+        self._write("\n", "tool_detail")
 
     # --------------------------------------------------------
-    # YOUTUBE RESULTS
+    # HELPER: poster / thumbnail (decoded off the Tk thread)
     # --------------------------------------------------------
-    def _insert_youtube_results(self, results):
-        self.history_text.insert(tk.END, "🎥 Trailer:\n", "tool_section")
+    def _insert_image(self, url, size):
+        if self.image_store is None or not url or url == "N/A":
+            return
 
-        for i, r in enumerate(results, 1):
-            title = r.get("title")
-            link = r.get("link")
+        images = self._entry_images.setdefault(self._rendering, {})
+        mark = f"image_{self._rendering}_{len(images)}"
+        images[mark] = None
+
+        # left gravity: text written after the placeholder stays after it
+        self.history_text.mark_set(mark, "end-1c" if self._at == tk.END else self._at)
+        self.history_text.mark_gravity(mark, tk.LEFT)
+
+        entry = self._rendering
+        self.image_store.load(url, size, lambda image: self.after(0, self._place_image, entry, mark, image))
+
+    def _place_image(self, entry, mark, image):
+        from PIL import ImageTk
+
+        images = self._entry_images.get(entry)
+        if images is None or mark not in images or images[mark] is not None:
+            return  # entry was evicted from the window meanwhile
+
+        photo = ImageTk.PhotoImage(image)
+        images[mark] = photo  # Tk does not keep its own reference
 
-            self.history_text.insert(tk.END, f"🎬 {title}\n", "tool_item")
-            self._insert_clickable_link(link)
-            self.history_text.insert(tk.END, "\n")
+        self.history_text.config(state=tk.NORMAL)
+        self.history_text.image_create(mark, image=photo, padx=30, pady=4)
+        self.history_text.insert(mark + " +1c", "\n")
+        self.history_text.config(state=tk.DISABLED)
 
     # --------------------------------------------------------
     # HELPER: clickable link
     # --------------------------------------------------------
-    def _insert_clickable_link(self, link, prefix=""):
-        self.history_text.insert(tk.END, "Source: ", "tool_link_label")
+    def _insert_clickable_link(self, link):
+        self._write("Source: ", "tool_link_label")
 
-        start = self.history_text.index(tk.INSERT)
-        self.history_text.insert(tk.END, f"{link}\n", "tool_link")
-        end = self.history_text.index(tk.INSERT)
+        tags = self._entry_tags.setdefault(self._rendering, [])
+        tag = f"link_{self._rendering}_{len(tags)}"
+        tags.append(tag)
 
-        tag = f"link_{prefix}_{hash(link)}"
-        self.history_text.tag_add(tag, start, end)
+        self._write(f"{link}\n", ("tool_link", tag))
         self.history_text.tag_config(tag, foreground=ThemeManager.COLORS["link"], underline=1)
         self.history_text.tag_bind(tag, "<Button-1>", lambda e, url=link: webbrowser.open(url))
 
@@ -212,10 +298,15 @@ class ConversationDisplay(ttk.LabelFrame):
 # QUERY INPUT UI
 # ====================================================================
 class QueryInput(ttk.Frame):
-    def __init__(self, parent, submit_callback, model_change_callback, **kwargs):
+    PREFETCH_DELAY_MS = 600
+    PREFETCH_MIN_CHARS = 3
+
+    def __init__(self, parent, submit_callback, model_change_callback, prefetch_callback=None, **kwargs):
         super().__init__(parent, padding=10, **kwargs)
 
         self.submit_callback = submit_callback
+        self.prefetch_callback = prefetch_callback
+        self._prefetch_after = None
 
         ttk.Label(
             self,
@@ -230,6 +321,7 @@ class QueryInput(ttk.Frame):
         self.query_entry = ttk.Entry(row, width=70)
         self.query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
         self.query_entry.bind("<Return>", self.on_submit)
+        self.query_entry.bind("<KeyRelease>", self.on_key_release)
 
         ttk.Button(
             row,
@@ -272,7 +364,26 @@ class QueryInput(ttk.Frame):
 
         self.query_entry.focus_set()
 
+    # debounce: only prefetch once the user pauses typing
+    def on_key_release(self, event=None):
+        if not self.prefetch_callback or (event is not None and event.keysym == "Return"):
+            return
+
+        if self._prefetch_after is not None:
+            self.after_cancel(self._prefetch_after)
+        self._prefetch_after = self.after(self.PREFETCH_DELAY_MS, self._fire_prefetch)
+
+    def _fire_prefetch(self):
+        self._prefetch_after = None
+        text = self.query_entry.get().strip()
+        if len(text) >= self.PREFETCH_MIN_CHARS:
+            self.prefetch_callback(text)
+
     def on_submit(self, event=None):
+        if self._prefetch_after is not None:
+            self.after_cancel(self._prefetch_after)
+            self._prefetch_after = None
+
         text = self.query_entry.get().strip()
         if text:
             self.submit_callback(text)